@@ -1,14 +1,72 @@
 import pandas as pd
 import numpy as np
+from drawing_codec import encode, decode, parse_bytes_repr
+
+COLUMNS = {
+    'vendors': ['vendor_id', 'vendor_name'],
+    'parts': ['part_id', 'part_name'],
+    'part_drawings': ['part_id', 'file_extension', 'drawing_data'],
+    'vendor_parts': ['vendor_id', 'part_id'],
+}
+
+# Compact column types: int32 ids and categorical names keep a 10M-link
+# snapshot small. drawing_data stays object (bytes).
+DTYPES = {
+    'vendors': {'vendor_id': 'int32', 'vendor_name': 'category'},
+    'parts': {'part_id': 'int32', 'part_name': 'category'},
+    'part_drawings': {'part_id': 'int32', 'file_extension': 'category'},
+    'vendor_parts': {'vendor_id': 'int32', 'part_id': 'int32'},
+}
+
+
+def _table_property(table):
+    """Attribute for one table that loads it from CSV on first access"""
+    def get(self):
+        if table in self._pending:
+            folder, columns = self._pending.pop(table)
+            self._tables[table] = self._read_table(table, folder, columns)
+        return self._tables[table]
+
+    def set(self, frame):
+        self._pending.pop(table, None)
+        self._tables[table] = frame
+
+    return property(get, set, doc=f"The {table} table, loaded lazily")
 
 
 class PartsDatabase:
+    vendors = _table_property('vendors')
+    parts = _table_property('parts')
+    part_drawings = _table_property('part_drawings')
+    vendor_parts = _table_property('vendor_parts')
+
     def __init__(self):
+        self._tables = {}
+        # table -> (folder, columns) still to be read on first access
+        self._pending = {}
+
         # Initialize empty DataFrames for all tables
-        self.vendors = pd.DataFrame(columns=['vendor_id', 'vendor_name'])
-        self.parts = pd.DataFrame(columns=['part_id', 'part_name'])
-        self.part_drawings = pd.DataFrame(columns=['part_id', 'file_extension', 'drawing_data'])
-        self.vendor_parts = pd.DataFrame(columns=['vendor_id', 'part_id'])
+        for table in COLUMNS:
+            setattr(self, table, self._empty(table))
+
+    def enforce_dtypes(self, *tables):
+        """Convert tables (all by default) to the compact DTYPES"""
+        for table in tables or DTYPES:
+            frame = getattr(self, table)
+            setattr(self, table, frame.astype(self._dtypes(table, frame.columns)))
+
+    @staticmethod
+    def _dtypes(table, columns):
+        return {column: dtype for column, dtype in DTYPES[table].items() if column in columns}
+
+    def append(self, table, rows):
+        """Append a DataFrame of rows to a table, keeping its dtypes"""
+        setattr(self, table, pd.concat([getattr(self, table), rows], ignore_index=True))
+        self.enforce_dtypes(table)
+
+    def memory_usage(self):
+        """Bytes used by each table, including strings"""
+        return {table: int(getattr(self, table).memory_usage(deep=True).sum()) for table in DTYPES}
 
     def save_all(self, folder='data/'):
         """Save all DataFrames to CSV files"""
@@ -18,16 +76,65 @@ class PartsDatabase:
         self.vendor_parts.to_csv(f'{folder}vendor_parts.csv', index=False)
         print("All data saved successfully")
 
-    def load_all(self, folder='data/'):
-        """Load all DataFrames from CSV files"""
+    def load_all(self, folder='data/', lazy=False, columns=None):
+        """Load all DataFrames from CSV files
+
+        With lazy=True a table is only read when it is first used, so a tool
+        that needs vendors never reads part_drawings.csv. columns maps table
+        names to the columns to read, e.g. {'part_drawings': ['part_id']}.
+        """
+        columns = columns or {}
+        for table in DTYPES:
+            self._pending[table] = (folder, columns.get(table))
+        if lazy:
+            return
+
+        for table in DTYPES:
+            getattr(self, table)
+        print("All data loaded successfully")
+
+    def _read_table(self, table, folder, columns=None):
+        """Read one table from its CSV file, or an empty table if it is missing"""
         try:
-            self.vendors = pd.read_csv(f'{folder}vendors.csv')
-            self.parts = pd.read_csv(f'{folder}parts.csv')
-            self.part_drawings = pd.read_csv(f'{folder}part_drawings.csv')
-            self.vendor_parts = pd.read_csv(f'{folder}vendor_parts.csv')
-            print("All data loaded successfully")
+            frame = pd.read_csv(f'{folder}{table}.csv', usecols=columns,
+                                dtype=self._dtypes(table, columns or DTYPES[table]))
         except FileNotFoundError as e:
-            print(f"Some files not found. Starting with empty tables: {e}")
+            print(f"File not found. Starting with an empty {table} table: {e}")
+            return self._empty(table, columns)
+        return frame
+
+    @classmethod
+    def _empty(cls, table, columns=None):
+        columns = columns or COLUMNS[table]
+        return pd.DataFrame(columns=columns).astype(cls._dtypes(table, columns))
+
+    def is_loaded(self, table):
+        """Whether a table is in memory (not waiting for lazy loading)"""
+        return table not in self._pending
+
+    def iter_table(self, table, chunksize=100000, columns=None, folder=None):
+        """Yield a table in DataFrames of up to chunksize rows
+
+        Reads straight from the CSV file (the lazy load folder, or folder),
+        so tables larger than memory can be processed; a table that only
+        exists in memory is sliced instead.
+        """
+        if table not in DTYPES:
+            raise ValueError(f"Unknown table {table}")
+        if folder is None and table in self._pending:
+            folder = self._pending[table][0]
+            columns = columns or self._pending[table][1]
+
+        if folder is None:
+            frame = getattr(self, table)
+            if columns:
+                frame = frame[columns]
+            for start in range(0, len(frame), chunksize):
+                yield frame.iloc[start:start + chunksize]
+            return
+
+        yield from pd.read_csv(f'{folder}{table}.csv', usecols=columns, chunksize=chunksize,
+                               dtype=self._dtypes(table, columns or DTYPES[table]))
 
     def insert_vendor(self, vendor_name):
         """Insert a new vendor"""
@@ -36,7 +143,7 @@ class PartsDatabase:
             'vendor_id': [vendor_id],
             'vendor_name': [vendor_name]
         })
-        self.vendors = pd.concat([self.vendors, new_vendor], ignore_index=True)
+        self.append('vendors', new_vendor)
         return vendor_id
 
     def insert_part(self, part_name):
@@ -46,20 +153,34 @@ class PartsDatabase:
             'part_id': [part_id],
             'part_name': [part_name]
         })
-        self.parts = pd.concat([self.parts, new_part], ignore_index=True)
+        self.append('parts', new_part)
         return part_id
 
-    def insert_part_drawing(self, part_id, file_extension, drawing_data):
-        """Insert a part drawing"""
+    def insert_part_drawing(self, part_id, file_extension, drawing_data, codec=None):
+        """Insert a part drawing, compressed with drawing_codec if a codec is given"""
         if part_id not in self.parts['part_id'].values:
             raise ValueError(f"Part ID {part_id} does not exist")
+        if codec is not None:
+            drawing_data = encode(drawing_data, codec)
 
         new_drawing = pd.DataFrame({
             'part_id': [part_id],
             'file_extension': [file_extension],
             'drawing_data': [drawing_data]
         })
-        self.part_drawings = pd.concat([self.part_drawings, new_drawing], ignore_index=True)
+        self.append('part_drawings', new_drawing)
+
+    def get_part_drawing(self, part_id):
+        """Get (file_extension, drawing_data) for a part, decompressing if needed"""
+        rows = self.part_drawings[self.part_drawings['part_id'] == part_id]
+        if rows.empty:
+            return None
+        row = rows.iloc[-1]
+        # after save_all/load_all, bytes come back from the CSV as their repr
+        drawing_data = parse_bytes_repr(row['drawing_data'])
+        if isinstance(drawing_data, (bytes, bytearray)):
+            drawing_data = decode(drawing_data)
+        return row['file_extension'], drawing_data
 
     def link_vendor_part(self, vendor_id, part_id):
         """Create a vendor-part relationship"""
@@ -72,7 +193,29 @@ class PartsDatabase:
             'vendor_id': [vendor_id],
             'part_id': [part_id]
         })
-        self.vendor_parts = pd.concat([self.vendor_parts, new_link], ignore_index=True)
+        self.append('vendor_parts', new_link)
+
+    def get_parts_by_vendor(self, vendor_id):
+        """Parts supplied by a vendor, like the get_parts_by_vendor() SQL function"""
+        part_ids = self.vendor_parts.loc[self.vendor_parts['vendor_id'] == vendor_id, 'part_id']
+        return self.parts[self.parts['part_id'].isin(part_ids)].reset_index(drop=True)
+
+    def get_vendors_by_part(self, part_id):
+        """Vendors supplying a part"""
+        vendor_ids = self.vendor_parts.loc[self.vendor_parts['part_id'] == part_id, 'vendor_id']
+        return self.vendors[self.vendors['vendor_id'].isin(vendor_ids)].reset_index(drop=True)
+
+    def get_parts_and_vendors(self):
+        """Every part with the list of its vendor names, like get_parts_and_vendors()"""
+        links = self.vendor_parts.merge(self.vendors, on='vendor_id')
+        vendor_lists = (links.sort_values(['part_id', 'vendor_id'])
+                        .groupby('part_id', observed=True)['vendor_name']
+                        .agg(list)
+                        .rename('vendors'))
+        result = self.parts.merge(vendor_lists, left_on='part_id', right_index=True, how='left')
+        # parts without vendors get an empty list, as the SQL version prints 'No vendors'
+        result['vendors'] = result['vendors'].apply(lambda vendors: vendors if isinstance(vendors, list) else [])
+        return result.sort_values('part_id').reset_index(drop=True)
 
     def print_all(self):
         """Print all tables"""
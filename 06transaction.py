@@ -1,5 +1,10 @@
 from configparser import ConfigParser
 import psycopg2
+from batch_insert import BatchReport, batch_insert
+from pipeline import Pipeline, queue_add_part, PIPELINE_PART_ID_SQL
+from router import get_router
+from rows import Vendor, row_cursor
+from write_coalescer import get_coalescer
 
 
 def load_config(filename='database.ini', section='postgresql'):
@@ -27,8 +32,40 @@ def connect(config):
         raise
 
 
-def create_tables():
-    """Create tables in the PostgreSQL database"""
+def partitioned_vendor_parts_commands(table_name='vendor_parts', partitions=8):
+    """Commands creating vendor_parts hash-partitioned by vendor_id"""
+    commands = [
+        f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            vendor_id INTEGER NOT NULL,
+            part_id INTEGER NOT NULL,
+            PRIMARY KEY (vendor_id, part_id),
+            FOREIGN KEY (vendor_id)
+                REFERENCES vendors (vendor_id)
+                ON UPDATE CASCADE ON DELETE CASCADE,
+            FOREIGN KEY (part_id)
+                REFERENCES parts (part_id)
+                ON UPDATE CASCADE ON DELETE CASCADE
+        ) PARTITION BY HASH (vendor_id)
+        """,
+        # lookups by part cannot be pruned, give every partition a part_id index
+        f"CREATE INDEX IF NOT EXISTS {table_name}_part_id_idx ON {table_name} (part_id)",
+    ]
+    for remainder in range(partitions):
+        commands.append(f"""
+        CREATE TABLE IF NOT EXISTS {table_name}_p{remainder}
+            PARTITION OF {table_name}
+            FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})
+        """)
+    return commands
+
+
+def create_tables(partitions=0):
+    """Create tables in the PostgreSQL database
+
+    With partitions > 0, vendor_parts is hash-partitioned by vendor_id
+    into that many partitions.
+    """
     commands = (
         """
         CREATE TABLE IF NOT EXISTS vendors (
@@ -66,6 +103,8 @@ def create_tables():
         )
         """
     )
+    if partitions:
+        commands = commands[:-1] + tuple(partitioned_vendor_parts_commands('vendor_parts', partitions))
 
     conn = None
     try:
@@ -89,14 +128,25 @@ def create_tables():
         if conn is not None:
             conn.close()
 
-def insert_vendor(vendor_name):
-    """ Insert a new vendor into the vendors table """
+def insert_vendor(vendor_name, coalesce=False):
+    """ Insert a new vendor into the vendors table
+
+    With coalesce=True the insert is handed to the shared WriteCoalescer and
+    committed together with other threads' concurrent vendor writes.
+    """
+    if coalesce:
+        try:
+            return get_coalescer().insert_vendor(vendor_name)
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(error)
+            return None
+
     sql = """INSERT INTO vendors(vendor_name)
              VALUES(%s) RETURNING vendor_id;"""
     vendor_id = None
-    config = load_config()
+    router = get_router()
     try:
-        with  psycopg2.connect(**config) as conn:
+        with  router.connect_write() as conn:
             with  conn.cursor() as cur:
                 # execute the INSERT statement
                 cur.execute(sql, (vendor_name,))
@@ -106,6 +156,7 @@ def insert_vendor(vendor_name):
                     vendor_id = rows[0]
                 # commit the changes to the database
                 conn.commit()
+                router.note_write(conn)
     except (Exception, psycopg2.DatabaseError) as error:
         print(error)
     finally:
@@ -114,15 +165,16 @@ def insert_many_vendors(vendor_list):
     """ Insert multiple vendors into the vendors table  """
 
     sql = "INSERT INTO vendors(vendor_name) VALUES(%s) RETURNING *"
-    config = load_config()
+    router = get_router()
     try:
-        with  psycopg2.connect(**config) as conn:
+        with  router.connect_write() as conn:
             with  conn.cursor() as cur:
                 # execute the INSERT statement
                 cur.executemany(sql, vendor_list)
 
             # commit the changes to the database
             conn.commit()
+            router.note_write(conn)
     except (Exception, psycopg2.DatabaseError) as error:
         print(error)
 
@@ -130,10 +182,10 @@ def insert_many_vendors(vendor_list):
 def print_vendors():
     """ Print all vendors from the vendors table """
     sql = "SELECT vendor_id, vendor_name FROM vendors ORDER BY vendor_id"
-    config = load_config()
+    router = get_router()
 
     try:
-        with psycopg2.connect(**config) as conn:
+        with router.connect_read() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql)
                 rows = cur.fetchall()
@@ -154,19 +206,29 @@ def print_vendors():
         print(f"Error fetching vendors: {error}")
 
 
-def update_vendor(vendor_id, vendor_name):
-    """ Update vendor name based on the vendor id """
+def update_vendor(vendor_id, vendor_name, coalesce=False):
+    """ Update vendor name based on the vendor id
+
+    With coalesce=True the update goes through the shared WriteCoalescer.
+    """
+    if coalesce:
+        try:
+            return get_coalescer().update_vendor(vendor_id, vendor_name)
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(f"Error updating vendor: {error}")
+            return None
+
     sql = """
     UPDATE vendors 
     SET vendor_name = %s 
     WHERE vendor_id = %s
     RETURNING vendor_id, vendor_name;
     """
-    config = load_config()
+    router = get_router()
     updated_vendor = None
 
     try:
-        with psycopg2.connect(**config) as conn:
+        with router.connect_write() as conn:
             with conn.cursor() as cur:
                 # Execute the UPDATE statement
                 cur.execute(sql, (vendor_name, vendor_id))
@@ -185,6 +247,7 @@ def update_vendor(vendor_id, vendor_name):
                     print(f"No vendor found with id: {vendor_id}")
 
                 conn.commit()
+                router.note_write(conn)
 
     except (Exception, psycopg2.DatabaseError) as error:
         print(f"Error updating vendor: {error}")
@@ -192,23 +255,21 @@ def update_vendor(vendor_id, vendor_name):
     return updated_vendor
 
 
-def get_vendors():
-    """ Retrieve data from the vendors table """
+def get_vendors(as_tuples=False):
+    """ Retrieve data from the vendors table
+
+    Rows are compact Vendor objects (vendor.vendor_id, vendor['vendor_name']),
+    or plain (vendor_id, vendor_name) tuples with as_tuples=True.
+    """
     sql = "SELECT vendor_id, vendor_name FROM vendors ORDER BY vendor_id"
-    config = load_config()
+    router = get_router()
     vendors = []
 
     try:
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor() as cur:
+        with router.connect_read() as conn:
+            with conn.cursor(cursor_factory=row_cursor(None if as_tuples else Vendor)) as cur:
                 cur.execute(sql)
-                rows = cur.fetchall()
-
-                for row in rows:
-                    vendors.append({
-                        'vendor_id': row[0],
-                        'vendor_name': row[1]
-                    })
+                vendors = cur.fetchall()
 
                 if not vendors:
                     print("No vendors found")
@@ -224,10 +285,10 @@ def get_vendors():
 def get_vendors_fetchall():
     """ Retrieve data from the vendors table by fetchall """
     sql = "SELECT * FROM vendors ORDER BY vendor_id"
-    config = load_config()
+    router = get_router()
 
     try:
-        with psycopg2.connect(**config) as conn:
+        with router.connect_read() as conn:
             with conn.cursor() as cur:
                 cur.execute(sql)
                 print("The number of parts: ", cur.rowcount)
@@ -241,8 +302,11 @@ def get_vendors_fetchall():
         print(f"Error retrieving vendors: {error}")
 
 
-def add_part(part_name, vendors_id):
+def add_part(part_name, vendors_id, pipeline=False):
     """ Insert a new part and assign vendors to it """
+    if pipeline:
+        return add_part_pipelined(part_name, vendors_id)
+
     # SQL for inserting a part
     part_sql = """
         INSERT INTO parts(part_name)
@@ -256,10 +320,10 @@ def add_part(part_name, vendors_id):
         VALUES(%s, %s)
     """
 
-    config = load_config()
+    router = get_router()
 
     try:
-        with psycopg2.connect(**config) as conn:
+        with router.connect_write() as conn:
             # Create a cursor
             cur = conn.cursor()
 
@@ -273,6 +337,7 @@ def add_part(part_name, vendors_id):
 
             # Commit the transaction
             conn.commit()
+            router.note_write(conn)
 
             print(f"Successfully added part '{part_name}' with ID: {part_id}")
             print(f"Assigned to vendors: {vendors_id}")
@@ -285,8 +350,156 @@ def add_part(part_name, vendors_id):
             conn.close()
 
 
-def get_parts_and_vendors():
-    """ Get all parts and their associated vendors """
+def add_part_pipelined(part_name, vendors_id):
+    """ Insert a new part and assign vendors to it in a single round trip """
+    router = get_router()
+    part_id = None
+
+    try:
+        with router.connect_write() as conn:
+            with conn.cursor() as cur:
+                pipeline = Pipeline(cur)
+                queue_add_part(pipeline, part_name, vendors_id)
+                pipeline.execute(PIPELINE_PART_ID_SQL)
+
+                # Only the part id is needed back, so sync once at the end
+                part_id = pipeline.sync()[0][0]
+                conn.commit()
+                router.note_write(conn)
+
+                print(f"Successfully added part '{part_name}' with ID: {part_id}")
+                print(f"Assigned to vendors: {vendors_id}")
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error adding part: {error}")
+
+    return part_id
+
+
+def add_part_by_vendor_names(part_name, vendor_names, cache):
+    """ Insert a new part and assign vendors to it by name
+
+    Vendor names are resolved through the VendorCache, so known vendors cost
+    no round trip and unknown ones are created once. The part is written on
+    the cache's connection and committed there.
+    """
+    conn = cache.conn
+    part_id = None
+
+    try:
+        misses = cache.misses
+        vendors_id = cache.get_ids(vendor_names)
+        if cache.misses != misses:
+            # commit new vendors first so a failed part cannot leave
+            # ids in the cache that were rolled back
+            conn.commit()
+        with conn.cursor() as cur:
+            pipeline = Pipeline(cur)
+            queue_add_part(pipeline, part_name, vendors_id)
+            pipeline.execute(PIPELINE_PART_ID_SQL)
+            part_id = pipeline.sync()[0][0]
+        conn.commit()
+        get_router().note_write(conn)
+
+        print(f"Successfully added part '{part_name}' with ID: {part_id}")
+        print(f"Assigned to vendors: {vendors_id}")
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        conn.rollback()
+        print(f"Error adding part: {error}")
+
+    return part_id
+
+
+def add_many_parts(parts_to_add):
+    """ Insert several parts with their vendors in one transaction and one round trip """
+    router = get_router()
+
+    try:
+        with router.connect_write() as conn:
+            with conn.cursor() as cur:
+                with Pipeline(cur) as pipeline:
+                    for part_name, vendors_id in parts_to_add:
+                        queue_add_part(pipeline, part_name, vendors_id)
+                conn.commit()
+                router.note_write(conn)
+                print(f"Successfully added {len(parts_to_add)} parts")
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error adding parts: {error}")
+
+
+def add_parts_bulk(parts_to_add, chunk_size=1000, rejected_file=None):
+    """ Insert many parts with their vendors, skipping only the rows that fail
+
+    Parts and vendor links are inserted in chunks; a chunk that fails is
+    bisected under savepoints so that, e.g., a link to a missing vendor_id
+    is rejected on its own while the rest of the chunk is committed.
+    Returns the (parts, links) BatchReports.
+    """
+    router = get_router()
+    parts_report = links_report = None
+
+    try:
+        with router.connect_write() as conn:
+            parts_report = batch_insert(conn, "INSERT INTO parts(part_name) VALUES %s RETURNING part_id",
+                                        [(part_name,) for part_name, _ in parts_to_add],
+                                        chunk_size, fetch=True, report=BatchReport('parts'))
+
+            links = [(vendor_id, parts_report.returned[i][0])
+                     for i, (_, vendors_id) in enumerate(parts_to_add) if i in parts_report.returned
+                     for vendor_id in vendors_id]
+            links_report = batch_insert(conn, "INSERT INTO vendor_parts(vendor_id, part_id) VALUES %s",
+                                        links, chunk_size, report=BatchReport('vendor_parts'))
+            router.note_write(conn)
+
+        print(f"Added {parts_report.inserted} parts and {links_report.inserted} vendor links "
+              f"({parts_report.statements + links_report.statements} statements)")
+        parts_report.print_rejected()
+        links_report.print_rejected()
+        if rejected_file:
+            parts_report.write_rejected_csv(rejected_file)
+            links_report.write_rejected_csv(rejected_file, append=True)
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error adding parts: {error}")
+
+    return parts_report, links_report
+
+
+def create_summary_from_file():
+    """ Create the trigger-maintained part_vendor_summary table from SQL file """
+    sql_file = 'part_vendor_summary.sql'
+    config = load_config()
+
+    try:
+        with open(sql_file, 'r') as file:
+            sql = file.read()
+
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                conn.commit()
+                print("Summary table created successfully")
+
+    except FileNotFoundError:
+        print(f"SQL file not found: {sql_file}")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error creating summary table: {error}")
+
+
+def get_parts_and_vendors(use_summary=True):
+    """ Get all parts and their associated vendors
+
+    Reads the part_vendor_summary table kept current by triggers when it
+    exists (see create_summary_from_file). Pass use_summary=False, or run on
+    a database without the table, to aggregate from the base tables instead.
+    """
+    summary_sql = """
+    SELECT part_id, part_name, vendors
+    FROM part_vendor_summary
+    ORDER BY part_id;
+    """
     sql = """
     SELECT 
         p.part_id,
@@ -302,12 +515,17 @@ def get_parts_and_vendors():
         p.part_id;
     """
 
-    config = load_config()
+    router = get_router()
 
     try:
-        with psycopg2.connect(**config) as conn:
+        with router.connect_read() as conn:
             with conn.cursor() as cur:
-                cur.execute(sql)
+                if use_summary:
+                    cur.execute("SELECT to_regclass('part_vendor_summary') IS NOT NULL")
+                    use_summary = cur.fetchone()[0]
+                    if not use_summary:
+                        print("part_vendor_summary does not exist; aggregating from the base tables")
+                cur.execute(summary_sql if use_summary else sql)
                 rows = cur.fetchall()
 
                 print("\nParts and their Vendors:")
@@ -317,7 +535,8 @@ def get_parts_and_vendors():
 
                 for row in rows:
                     part_id, part_name, vendors = row
-                    vendors_str = ', '.join(vendors) if vendors[0] is not None else 'No vendors'
+                    vendors = [v for v in vendors if v is not None]
+                    vendors_str = ', '.join(vendors) if vendors else 'No vendors'
                     print(f"{part_id:<8} {part_name:<20} {vendors_str:<40}")
 
                 print("-" * 70)
@@ -1,5 +1,7 @@
 import psycopg2
 from config import load_config
+from router import get_router
+from rows import Part, row_cursor
 
 
 def create_function_from_file():
@@ -23,30 +25,29 @@ def create_function_from_file():
         print(f"Error creating function: {error}")
 
 
-def get_parts(vendor_id):
-    """ Get parts provided by a vendor specified by the vendor_id """
+def get_parts(vendor_id, as_tuples=False):
+    """ Get parts provided by a vendor specified by the vendor_id
+
+    Rows are compact Part objects, or plain (part_id, part_name) tuples
+    with as_tuples=True.
+    """
     parts = []
-    config = load_config()
+    router = get_router()
 
     try:
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor() as cur:
+        with router.connect_read() as conn:
+            with conn.cursor(cursor_factory=row_cursor(None if as_tuples else Part)) as cur:
                 # Call the stored procedure
                 cur.callproc('get_parts_by_vendor', (vendor_id,))
 
                 # Fetch all results
-                rows = cur.fetchall()
-                for row in rows:
-                    parts.append({
-                        'part_id': row[0],
-                        'part_name': row[1]
-                    })
+                parts = cur.fetchall()
 
                 if parts:
                     print(f"\nParts supplied by vendor {vendor_id}:")
                     print("-" * 40)
-                    for part in parts:
-                        print(f"Part ID: {part['part_id']}, Name: {part['part_name']}")
+                    for part_id, part_name in parts:
+                        print(f"Part ID: {part_id}, Name: {part_name}")
                 else:
                     print(f"\nNo parts found for vendor {vendor_id}")
 
@@ -1,45 +1,71 @@
 import psycopg2
 from config import load_config
+from router import get_router
+from pipeline import Pipeline
 def create_procedure_from_file():
     """ Create PostgreSQL procedure from SQL file """
-    sql_file = 'add_new_part.sql'
+    # add_new_part calls get_or_create_vendor, so create it first
+    sql_files = ['vendor_upsert.sql', 'add_new_part.sql']
     config = load_config()
 
     try:
-        # Read SQL file
-        with open(sql_file, 'r') as file:
-            sql = file.read()
+        # Read SQL files
+        sqls = []
+        for sql_file in sql_files:
+            with open(sql_file, 'r') as file:
+                sqls.append(file.read())
 
         # Create procedure
         with psycopg2.connect(**config) as conn:
             with conn.cursor() as cur:
-                cur.execute(sql)
+                for sql in sqls:
+                    cur.execute(sql)
                 conn.commit()
                 print("Procedure created successfully")
 
-    except FileNotFoundError:
-        print(f"SQL file not found: {sql_file}")
+    except FileNotFoundError as error:
+        print(f"SQL file not found: {error.filename}")
     except (Exception, psycopg2.DatabaseError) as error:
         print(f"Error creating procedure: {error}")
 
 
 def add_part(part_name, vendor_name):
     """ Add a new part with its vendor """
-    config = load_config()
+    router = get_router()
 
     try:
-        with psycopg2.connect(**config) as conn:
+        with router.connect_write() as conn:
             with conn.cursor() as cur:
                 # Call the stored procedure
                 cur.execute('CALL add_new_part(%s, %s)',
                             (part_name, vendor_name))
                 conn.commit()
+                router.note_write(conn)
                 print(f"Successfully added part '{part_name}' with vendor '{vendor_name}'")
 
     except (Exception, psycopg2.DatabaseError) as error:
         print(f"Error adding part: {error}")
 
 
+def add_many_parts(parts_to_add):
+    """ Call the add_new_part procedure for several parts in one round trip """
+    router = get_router()
+
+    try:
+        with router.connect_write() as conn:
+            with conn.cursor() as cur:
+                with Pipeline(cur) as pipeline:
+                    for part_name, vendor_name in parts_to_add:
+                        pipeline.execute('CALL add_new_part(%s, %s)',
+                                         (part_name, vendor_name))
+                conn.commit()
+                router.note_write(conn)
+                print(f"Successfully added {len(parts_to_add)} parts")
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error adding parts: {error}")
+
+
 if __name__ == '__main__':
     # First create the procedure
     create_procedure_from_file()
@@ -1,10 +1,21 @@
+import json
+import sys
+
 import psycopg2
-from graphviz import Digraph
 from config import load_config
+from router import get_router
+
+# Tables created by this project, used to filter the statistics views
+PROJECT_TABLES = [
+    'vendors', 'parts', 'vendor_parts', 'part_drawings',
+    'part_vendor_summary', 'drawing_blobs', 'import_jobs',
+]
 
 
 def visualize_db_structure():
     """Create a database structure visualization"""
+    # graphviz is only needed here, keep it out of the health check
+    from graphviz import Digraph
 
     # Create a new directed graph
     dot = Digraph(comment='Database Structure')
@@ -12,8 +23,8 @@ def visualize_db_structure():
 
     try:
         # Connect to database
-        config = load_config()
-        conn = psycopg2.connect(**config)
+        router = get_router()
+        conn = router.connect_read()
         cur = conn.cursor()
 
         # Get all tables
@@ -78,5 +89,205 @@ def visualize_db_structure():
             conn.close()
 
 
+def fetch_dicts(cur, sql, params=None):
+    """Run a query and return its rows as dicts keyed by column name"""
+    cur.execute(sql, params)
+    columns = [desc[0] for desc in cur.description]
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+def collect_health(long_transaction_seconds=60, top_statements=10):
+    """Collect size, bloat, index usage, cache and activity statistics
+
+    Partitioned tables have no storage of their own, so their partitions are
+    reported instead, with the partitioned table in parent.
+    """
+    # every leaf of the project tables: the table itself or its partitions
+    relations_sql = """
+        WITH project AS (
+            SELECT t.relid, c.relname AS parent
+            FROM pg_class c
+                CROSS JOIN LATERAL pg_partition_tree(c.oid) t
+            WHERE c.relname = ANY(%s) AND c.relkind IN ('r', 'p') AND t.isleaf
+        )
+    """
+    table_sql = relations_sql + """
+        SELECT
+            s.relname AS table_name,
+            project.parent,
+            pg_total_relation_size(s.relid) AS total_bytes,
+            pg_relation_size(s.relid) AS table_bytes,
+            pg_indexes_size(s.relid) AS index_bytes,
+            s.n_live_tup AS live_tuples,
+            s.n_dead_tup AS dead_tuples,
+            round(100.0 * s.n_dead_tup / nullif(s.n_live_tup + s.n_dead_tup, 0), 1)::float8 AS dead_pct,
+            s.seq_scan,
+            s.idx_scan,
+            round(100.0 * io.heap_blks_hit / nullif(io.heap_blks_hit + io.heap_blks_read, 0), 1)::float8 AS cache_hit_pct,
+            s.last_autovacuum::text,
+            s.last_autoanalyze::text
+        FROM project
+            JOIN pg_stat_user_tables s ON s.relid = project.relid
+            JOIN pg_statio_user_tables io ON io.relid = s.relid
+        ORDER BY pg_total_relation_size(s.relid) DESC
+    """
+    index_sql = relations_sql + """
+        SELECT
+            i.relname AS table_name,
+            project.parent,
+            i.indexrelname AS index_name,
+            pg_relation_size(i.indexrelid) AS index_bytes,
+            i.idx_scan,
+            i.idx_tup_read
+        FROM project
+            JOIN pg_stat_user_indexes i ON i.relid = project.relid
+        ORDER BY i.idx_scan, pg_relation_size(i.indexrelid) DESC
+    """
+    database_sql = """
+        SELECT
+            pg_database_size(current_database()) AS database_bytes,
+            round(100.0 * blks_hit / nullif(blks_hit + blks_read, 0), 2)::float8 AS cache_hit_pct,
+            xact_commit,
+            xact_rollback,
+            deadlocks
+        FROM pg_stat_database
+        WHERE datname = current_database()
+    """
+    transaction_sql = """
+        SELECT
+            pid,
+            usename AS user_name,
+            state,
+            extract(epoch FROM now() - xact_start)::int AS seconds,
+            left(query, 200) AS query
+        FROM pg_stat_activity
+        WHERE xact_start IS NOT NULL
+          AND now() - xact_start > make_interval(secs => %s)
+          AND pid <> pg_backend_pid()
+        ORDER BY xact_start
+    """
+    # total_exec_time is called total_time before PostgreSQL 13
+    statements_sql = """
+        SELECT
+            calls,
+            round(({time_column})::numeric, 1)::float8 AS total_ms,
+            round(({time_column} / nullif(calls, 0))::numeric, 2)::float8 AS mean_ms,
+            rows,
+            left(query, 200) AS query
+        FROM pg_stat_statements
+        WHERE query ~* %s
+        ORDER BY {time_column} DESC
+        LIMIT %s
+    """
+
+    health = {}
+    config = load_config()
+
+    with psycopg2.connect(**config) as conn:
+        with conn.cursor() as cur:
+            health['database'] = fetch_dicts(cur, database_sql)[0]
+            health['tables'] = fetch_dicts(cur, table_sql, (PROJECT_TABLES,))
+            health['indexes'] = fetch_dicts(cur, index_sql, (PROJECT_TABLES,))
+            health['long_transactions'] = fetch_dicts(cur, transaction_sql, (long_transaction_seconds,))
+
+            health['statements'] = None
+            health['statements_error'] = None
+            cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+            if cur.fetchone() is None:
+                health['statements_error'] = "pg_stat_statements is not installed"
+            else:
+                # the view errors when the library is not preloaded or the
+                # role may not read it; the rest of the report still counts
+                cur.execute("SAVEPOINT statements")
+                try:
+                    cur.execute("""
+                        SELECT column_name FROM information_schema.columns
+                        WHERE table_name = 'pg_stat_statements' AND column_name = 'total_exec_time'
+                    """)
+                    time_column = 'total_exec_time' if cur.fetchone() else 'total_time'
+                    pattern = r'\m(' + '|'.join(PROJECT_TABLES) + r')\M'
+                    health['statements'] = fetch_dicts(
+                        cur, statements_sql.format(time_column=time_column), (pattern, top_statements))
+                    cur.execute("RELEASE SAVEPOINT statements")
+                except psycopg2.Error as error:
+                    cur.execute("ROLLBACK TO SAVEPOINT statements")
+                    health['statements_error'] = f"pg_stat_statements is not readable: {error}".strip()
+    conn.close()
+
+    return health
+
+
+def format_bytes(size):
+    """Human readable size"""
+    for unit in ('B', 'kB', 'MB', 'GB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def print_health(health):
+    """Print the health report as text"""
+    database = health['database']
+    print("\nDatabase:")
+    print("-" * 70)
+    print(f"Size: {format_bytes(database['database_bytes'])}, "
+          f"cache hit: {database['cache_hit_pct']}%, "
+          f"commits: {database['xact_commit']}, rollbacks: {database['xact_rollback']}, "
+          f"deadlocks: {database['deadlocks']}")
+
+    print("\nTables:")
+    print("-" * 100)
+    print(f"{'Table':<22} {'Total':>9} {'Indexes':>9} {'Live':>10} {'Dead':>10} {'Dead%':>6} "
+          f"{'SeqScan':>9} {'IdxScan':>9} {'Hit%':>6}")
+    print("-" * 100)
+    for t in health['tables']:
+        print(f"{t['table_name']:<22} {format_bytes(t['total_bytes']):>9} {format_bytes(t['index_bytes']):>9} "
+              f"{t['live_tuples']:>10} {t['dead_tuples']:>10} {str(t['dead_pct'] or 0):>6} "
+              f"{t['seq_scan'] or 0:>9} {t['idx_scan'] or 0:>9} {str(t['cache_hit_pct'] or '-'):>6}")
+
+    print("\nIndexes (least used first):")
+    print("-" * 80)
+    print(f"{'Index':<40} {'Table':<20} {'Size':>9} {'Scans':>9}")
+    print("-" * 80)
+    for i in health['indexes']:
+        print(f"{i['index_name']:<40} {i['table_name']:<20} {format_bytes(i['index_bytes']):>9} {i['idx_scan']:>9}")
+
+    print("\nLong-running transactions:")
+    print("-" * 80)
+    if not health['long_transactions']:
+        print("None")
+    for t in health['long_transactions']:
+        print(f"pid {t['pid']} ({t['user_name']}, {t['state']}) open for {t['seconds']}s: {t['query']}")
+
+    print("\nTop statements:")
+    print("-" * 80)
+    if health['statements'] is None:
+        print(health.get('statements_error') or "pg_stat_statements is not available")
+    else:
+        for s in health['statements']:
+            print(f"{s['calls']:>8} calls {s['total_ms']:>12} ms total {s['mean_ms']:>10} ms mean")
+            print(f"    {' '.join(s['query'].split())[:100]}")
+
+
+def check_health(as_json=False):
+    """Print a database health report as text or JSON"""
+    try:
+        health = collect_health()
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error collecting health report: {error}")
+        return None
+
+    if as_json:
+        json.dump(health, sys.stdout, indent=2, default=str)
+        print()
+    else:
+        print_health(health)
+    return health
+
+
 if __name__ == '__main__':
-    visualize_db_structure()
\ No newline at end of file
+    if '--health' in sys.argv:
+        check_health(as_json='--json' in sys.argv)
+    else:
+        visualize_db_structure()
\ No newline at end of file
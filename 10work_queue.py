@@ -0,0 +1,202 @@
+import os
+import socket
+import time
+from multiprocessing import Pool
+
+import psycopg2
+from psycopg2.extras import Json, execute_values
+from config import load_config
+from pipeline import Pipeline, queue_add_part
+
+
+def create_queue_from_file():
+    """ Create the import_jobs queue table from SQL file """
+    sql_file = 'import_jobs.sql'
+    config = load_config()
+
+    try:
+        with open(sql_file, 'r') as file:
+            sql = file.read()
+
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                conn.commit()
+                print("Import queue created successfully")
+
+    except FileNotFoundError:
+        print(f"SQL file not found: {sql_file}")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error creating import queue: {error}")
+
+
+def enqueue_jobs(jobs):
+    """ Add import jobs to the queue
+
+    jobs is a list of (job_type, payload) tuples:
+      ('part', {'part_name': ..., 'vendors_id': [...]})      -> 06transaction.add_part
+      ('part_vendor', {'part_name': ..., 'vendor_name': ...}) -> add_new_part procedure
+    """
+    sql = "INSERT INTO import_jobs(job_type, payload) VALUES %s"
+    config = load_config()
+
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, sql, [(job_type, Json(payload)) for job_type, payload in jobs])
+            conn.commit()
+            print(f"Enqueued {len(jobs)} jobs")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error enqueuing jobs: {error}")
+
+
+def queue_job(pipeline, job_type, payload):
+    """ Queue the statements for one job with the add_part / add_new_part semantics """
+    if job_type == 'part':
+        queue_add_part(pipeline, payload['part_name'], payload.get('vendors_id', []))
+    elif job_type == 'part_vendor':
+        pipeline.execute('CALL add_new_part(%s, %s)',
+                         (payload['part_name'], payload['vendor_name']))
+    else:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+
+def claim_and_apply(cur, worker, batch_size):
+    """ Claim a batch of pending jobs, apply them and mark them finished
+
+    The claimed rows stay locked until the caller commits, and other workers
+    skip them instead of waiting. Each job runs in its own savepoint so one
+    bad job is marked failed without undoing the rest of the batch.
+    """
+    claim_sql = """
+        SELECT job_id, job_type, payload
+        FROM import_jobs
+        WHERE status = 'pending'
+        ORDER BY job_id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    """
+    finish_sql = """
+        UPDATE import_jobs
+        SET status = %s, worker = %s, error = %s, finished_at = now()
+        WHERE job_id = %s
+    """
+
+    cur.execute(claim_sql, (batch_size,))
+    jobs = cur.fetchall()
+
+    done = 0
+    for job_id, job_type, payload in jobs:
+        try:
+            with Pipeline(cur) as pipeline:
+                pipeline.execute('SAVEPOINT import_job')
+                queue_job(pipeline, job_type, payload)
+                pipeline.execute('RELEASE SAVEPOINT import_job')
+                pipeline.execute(finish_sql, ('done', worker, None, job_id))
+            done += 1
+        except psycopg2.Error as error:
+            cur.execute('ROLLBACK TO SAVEPOINT import_job')
+            cur.execute(finish_sql, ('failed', worker, str(error), job_id))
+        except (KeyError, ValueError) as error:
+            # bad payload: nothing was sent to the server for this job
+            cur.execute(finish_sql, ('failed', worker, repr(error), job_id))
+
+    return len(jobs), done
+
+
+def run_worker(worker, batch_size=100):
+    """ Process jobs until the queue is empty and return (worker, jobs, done, seconds) """
+    config = load_config()
+    total = done = 0
+    start = time.perf_counter()
+
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                while True:
+                    claimed, applied = claim_and_apply(cur, worker, batch_size)
+                    conn.commit()
+                    if not claimed:
+                        break
+                    total += claimed
+                    done += applied
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Worker {worker} stopped: {error}")
+
+    elapsed = time.perf_counter() - start
+    return worker, total, done, elapsed
+
+
+def run_workers(processes=None, batch_size=100):
+    """ Drain the queue with a pool of worker processes """
+    processes = processes or os.cpu_count()
+    names = [f"{socket.gethostname()}-{os.getpid()}-{i}" for i in range(processes)]
+
+    with Pool(processes) as pool:
+        results = pool.starmap(run_worker, [(name, batch_size) for name in names])
+
+    print("\nWorker throughput:")
+    print("-" * 70)
+    print(f"{'Worker':<35} {'Jobs':>8} {'Done':>8} {'Jobs/sec':>12}")
+    print("-" * 70)
+    for worker, total, done, elapsed in results:
+        rate = total / elapsed if elapsed > 0 else 0
+        print(f"{worker:<35} {total:>8} {done:>8} {rate:>12.1f}")
+    print("-" * 70)
+
+    return results
+
+
+def print_queue_status():
+    """ Print the queue depth and the throughput of every worker """
+    depth_sql = """
+        SELECT status, count(*)
+        FROM import_jobs
+        GROUP BY status
+        ORDER BY status
+    """
+    worker_sql = """
+        SELECT worker,
+               count(*),
+               count(*) FILTER (WHERE status = 'failed'),
+               extract(epoch FROM max(finished_at) - min(finished_at))
+        FROM import_jobs
+        WHERE worker IS NOT NULL
+        GROUP BY worker
+        ORDER BY worker
+    """
+    config = load_config()
+
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                cur.execute(depth_sql)
+                print("\nQueue depth:")
+                print("-" * 40)
+                for status, count in cur.fetchall():
+                    print(f"{status:<10} {count:>10}")
+
+                cur.execute(worker_sql)
+                print("\nWorkers:")
+                print("-" * 70)
+                print(f"{'Worker':<35} {'Jobs':>8} {'Failed':>8} {'Jobs/sec':>12}")
+                print("-" * 70)
+                for worker, count, failed, seconds in cur.fetchall():
+                    rate = count / float(seconds) if seconds else 0
+                    print(f"{worker:<35} {count:>8} {failed:>8} {rate:>12.1f}")
+                print("-" * 70)
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error reading queue status: {error}")
+
+
+# 사용 예시:
+if __name__ == '__main__':
+    create_queue_from_file()
+    enqueue_jobs([
+        ('part', {'part_name': 'SIM Tray', 'vendors_id': [1, 2]}),
+        ('part', {'part_name': 'Speaker', 'vendors_id': [3, 4]}),
+        ('part_vendor', {'part_name': 'OLED', 'vendor_name': 'LG'}),
+    ])
+    run_workers(processes=2)
+    print_queue_status()
@@ -0,0 +1,207 @@
+import csv
+import importlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import psycopg2
+from psycopg2 import sql
+from config import load_config
+from drawing_codec import decode, parse_bytes_repr
+
+# part_drawings only holds a blob hash since the drawing store migration
+drawing_store = importlib.import_module('14drawing_store')
+
+# Tables in the same stage have no foreign keys to each other and load in
+# parallel; a stage only starts once every chunk of the previous one is in.
+LOAD_STAGES = (
+    ('vendors', 'parts'),
+    ('vendor_parts', 'part_drawings'),
+)
+
+# Serial columns whose sequences must be moved past the loaded ids
+SERIAL_COLUMNS = {
+    'vendors': 'vendor_id',
+    'parts': 'part_id',
+}
+
+
+class RangeReader:
+    """ File-like object that only reads the bytes between start and end """
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.remaining = end - start
+        self.file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def split_csv(path, chunk_bytes):
+    """ Split a CSV file into (start, end) byte ranges on line boundaries
+
+    Returns the header line and the ranges. Chunks are cut at the next newline,
+    so fields must not contain embedded newlines (true for the save_all export).
+    """
+    size = os.path.getsize(path)
+    ranges = []
+
+    with open(path, 'rb') as file:
+        header = file.readline()
+        start = file.tell()
+
+        while start < size:
+            file.seek(min(start + chunk_bytes, size))
+            file.readline()
+            end = min(file.tell(), size)
+            ranges.append((start, end))
+            start = end
+
+    return header.decode('utf-8').strip(), ranges
+
+
+def copy_chunk(table, columns, path, start, end):
+    """ COPY one byte range of a CSV file into the table on its own connection """
+    copy_sql = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        sql.Identifier(table),
+        sql.SQL(', ').join(map(sql.Identifier, columns))
+    )
+    config = load_config()
+
+    with psycopg2.connect(**config) as conn:
+        with conn.cursor() as cur:
+            with open(path, 'rb') as file:
+                cur.copy_expert(copy_sql, RangeReader(file, start, end))
+            rows = cur.rowcount
+        conn.commit()
+    conn.close()
+
+    return table, rows
+
+
+def drawing_bytes(value):
+    """ Drawing bytes from a part_drawings.csv field as save_all writes it
+
+    bytes are written as their repr (b'...'), bytea hex as \\x..., anything
+    else is the text itself. Data insert_part_drawing stored encoded is
+    decoded here so the upload compresses it only once.
+    """
+    data = parse_bytes_repr(value)
+    if isinstance(data, bytes):
+        return decode(data)
+    if data.startswith('\\x'):
+        return decode(bytes.fromhex(data[2:]))
+    return decode(data.encode('utf-8'))
+
+
+def upload_drawing_chunk(table, columns, path, start, end):
+    """ Upload one byte range of part_drawings.csv through the drawing store
+
+    The drawing bytes go to drawing_blobs and part_drawings only gets the
+    hash, so this table cannot be COPYed as it is.
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode('utf-8')
+
+    drawings = []
+    for row in csv.reader(io.StringIO(text)):
+        record = dict(zip(columns, row))
+        drawings.append((int(record['part_id']), record['file_extension'],
+                         drawing_bytes(record['drawing_data'])))
+
+    config = load_config()
+    with psycopg2.connect(**config) as conn:
+        # chunks run in parallel and can share drawings, so deadlocks are retried
+        drawing_store.commit_drawings(conn, drawings)
+    conn.close()
+
+    return table, len(drawings)
+
+
+# Tables that need more than a COPY of their CSV rows
+CHUNK_LOADERS = {
+    'part_drawings': upload_drawing_chunk,
+}
+
+
+def reset_sequences(tables):
+    """ Move serial sequences past the ids that were loaded explicitly """
+    config = load_config()
+
+    with psycopg2.connect(**config) as conn:
+        with conn.cursor() as cur:
+            for table in tables:
+                column = SERIAL_COLUMNS.get(table)
+                if column is None:
+                    continue
+                cur.execute(
+                    sql.SQL("SELECT setval(pg_get_serial_sequence(%s, %s), "
+                            "COALESCE(max({}), 0) + 1, false) FROM {}").format(
+                        sql.Identifier(column), sql.Identifier(table)),
+                    (table, column)
+                )
+        conn.commit()
+    conn.close()
+
+
+def load_csv_folder(folder='data/', processes=None, chunk_bytes=64 * 1024 * 1024):
+    """ Load the save_all CSV export into PostgreSQL with parallel COPY """
+    processes = processes or os.cpu_count()
+    total_rows = 0
+    total_start = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for stage in LOAD_STAGES:
+                stage_start = time.perf_counter()
+                futures = []
+
+                for table in stage:
+                    path = os.path.join(folder, f'{table}.csv')
+                    if not os.path.exists(path):
+                        print(f"Skipping {table}: {path} not found")
+                        continue
+
+                    header, ranges = split_csv(path, chunk_bytes)
+                    columns = header.split(',')
+                    for start, end in ranges:
+                        loader = CHUNK_LOADERS.get(table, copy_chunk)
+                        futures.append(pool.submit(loader, table, columns, path, start, end))
+
+                table_rows = {}
+                for future in futures:
+                    table, rows = future.result()
+                    table_rows[table] = table_rows.get(table, 0) + rows
+
+                elapsed = time.perf_counter() - stage_start
+                for table, rows in table_rows.items():
+                    rate = rows / elapsed if elapsed > 0 else 0
+                    print(f"Loaded {rows} rows into {table} ({rate:,.0f} rows/sec)")
+                    total_rows += rows
+
+                reset_sequences(stage)
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error loading CSV files: {error}")
+
+    elapsed = time.perf_counter() - total_start
+    rate = total_rows / elapsed if elapsed > 0 else 0
+    print(f"Total: {total_rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    return total_rows
+
+
+# 사용 예시:
+if __name__ == '__main__':
+    load_csv_folder('data/')
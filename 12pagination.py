@@ -0,0 +1,154 @@
+import base64
+import json
+
+import psycopg2
+from config import load_config
+
+
+class InvalidPageToken(ValueError):
+    """ A continuation token that was not produced by encode_token """
+
+
+def encode_token(last_id):
+    """ Turn the last key of a page into an opaque continuation token """
+    raw = json.dumps({'after': last_id}).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_token(token):
+    """ Get the last key back from a continuation token (None starts at the first page) """
+    if not token:
+        return 0
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded))['after']
+    except (ValueError, KeyError, TypeError):
+        raise InvalidPageToken(f"Invalid page token: {token}")
+    if not isinstance(after, int):
+        raise InvalidPageToken(f"Invalid page token: {token}")
+    return after
+
+
+def fetch_page(sql, after, limit):
+    """ Run a keyset query after the key after and return (rows, next_token)
+
+    The query takes the last key and a row limit and must return the key
+    first. One extra row is fetched to know whether another page exists.
+    """
+    config = load_config()
+
+    with psycopg2.connect(**config) as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (after, limit + 1))
+            rows = cur.fetchall()
+    conn.close()
+
+    next_token = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_token = encode_token(rows[-1][0])
+    return rows, next_token
+
+
+def get_vendors_page(token=None, limit=100):
+    """ Retrieve one page of vendors ordered by vendor_id
+
+    A bad token raises InvalidPageToken instead of looking like the end of
+    the list.
+    """
+    sql = """
+        SELECT vendor_id, vendor_name
+        FROM vendors
+        WHERE vendor_id > %s
+        ORDER BY vendor_id
+        LIMIT %s
+    """
+    vendors = []
+    next_token = None
+
+    after = decode_token(token)
+
+    try:
+        rows, next_token = fetch_page(sql, after, limit)
+        for row in rows:
+            vendors.append({
+                'vendor_id': row[0],
+                'vendor_name': row[1]
+            })
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error retrieving vendors: {error}")
+
+    return vendors, next_token
+
+
+def get_parts_and_vendors_page(token=None, limit=100):
+    """ Retrieve one page of parts with their vendors ordered by part_id
+
+    A bad token raises InvalidPageToken, like get_vendors_page.
+    """
+    # page the parts first so only this page is joined and aggregated
+    sql = """
+        SELECT
+            p.part_id,
+            p.part_name,
+            array_agg(v.vendor_name) as vendors
+        FROM
+            (SELECT part_id, part_name
+             FROM parts
+             WHERE part_id > %s
+             ORDER BY part_id
+             LIMIT %s) p
+            LEFT JOIN vendor_parts vp ON p.part_id = vp.part_id
+            LEFT JOIN vendors v ON vp.vendor_id = v.vendor_id
+        GROUP BY
+            p.part_id, p.part_name
+        ORDER BY
+            p.part_id;
+    """
+    parts = []
+    next_token = None
+
+    after = decode_token(token)
+
+    try:
+        rows, next_token = fetch_page(sql, after, limit)
+        for part_id, part_name, vendors in rows:
+            parts.append({
+                'part_id': part_id,
+                'part_name': part_name,
+                'vendors': [v for v in vendors if v is not None]
+            })
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error retrieving parts and vendors: {error}")
+
+    return parts, next_token
+
+
+def print_vendors_paged(limit=100):
+    """ Print all vendors one page at a time """
+    token = None
+    total = 0
+
+    print("\nVendors List:")
+    print("-" * 40)
+    print(f"{'ID':<5} {'Name':<35}")
+    print("-" * 40)
+    while True:
+        vendors, token = get_vendors_page(token, limit)
+        for vendor in vendors:
+            print(f"{vendor['vendor_id']:<5} {vendor['vendor_name']:<35}")
+        total += len(vendors)
+        if token is None:
+            break
+    print("-" * 40)
+    print(f"Total vendors: {total}")
+
+
+# 사용 예시:
+if __name__ == '__main__':
+    print_vendors_paged(limit=2)
+
+    parts, token = get_parts_and_vendors_page(limit=2)
+    print(parts, token)
+    parts, token = get_parts_and_vendors_page(token, limit=2)
+    print(parts, token)
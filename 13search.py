@@ -0,0 +1,136 @@
+import psycopg2
+from psycopg2 import sql
+from config import load_config
+
+# table -> (id column, name column, tsvector column)
+SEARCH_TARGETS = {
+    'vendors': ('vendor_id', 'vendor_name', 'vendor_tsv'),
+    'parts': ('part_id', 'part_name', 'part_tsv'),
+}
+# pg_trgm cannot use the trigram index for shorter substring searches
+MIN_TRIGRAM_LENGTH = 3
+
+
+def create_search_indexes_from_file(fulltext=False):
+    """ Create the trigram indexes (and optionally the full-text columns) from SQL files """
+    sql_files = ['search_indexes.sql']
+    if fulltext:
+        sql_files.append('search_fulltext.sql')
+    config = load_config()
+
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                for sql_file in sql_files:
+                    with open(sql_file, 'r') as file:
+                        cur.execute(file.read())
+                conn.commit()
+                print("Search indexes created successfully")
+
+    except FileNotFoundError as error:
+        print(f"SQL file not found: {error.filename}")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error creating search indexes: {error}")
+
+
+def escape_like(text):
+    """ Escape LIKE wildcards so user input is matched literally """
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_names(table, text, limit=10):
+    """ Fuzzy search a name column using the trigram index
+
+    Rows either contain the text or are similar to it, best matches first.
+    Text shorter than MIN_TRIGRAM_LENGTH has no trigrams to look up, so it
+    only matches names starting with it, through the lower(name) prefix
+    index, in name order. Returns a list of (id, name, score) tuples.
+    """
+    id_column, name_column, _ = SEARCH_TARGETS[table]
+    if len(text) < MIN_TRIGRAM_LENGTH:
+        query = sql.SQL("""
+            SELECT {id}, {name}, similarity({name}, %(text)s) AS score
+            FROM {table}
+            WHERE lower({name}) LIKE %(pattern)s
+            ORDER BY lower({name}), {id}
+            LIMIT %(limit)s
+        """)
+        pattern = f"{escape_like(text.lower())}%"
+    else:
+        query = sql.SQL("""
+            SELECT {id}, {name}, similarity({name}, %(text)s) AS score
+            FROM {table}
+            WHERE {name} %% %(text)s OR {name} ILIKE %(pattern)s
+            ORDER BY score DESC, {id}
+            LIMIT %(limit)s
+        """)
+        pattern = f"%{escape_like(text)}%"
+    query = query.format(
+        id=sql.Identifier(id_column),
+        name=sql.Identifier(name_column),
+        table=sql.Identifier(table)
+    )
+    params = {'text': text, 'pattern': pattern, 'limit': limit}
+    config = load_config()
+    matches = []
+
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                matches = cur.fetchall()
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error searching {table}: {error}")
+
+    return matches
+
+
+def search_names_fulltext(table, text, limit=10):
+    """ Full-text search using the tsvector column from search_fulltext.sql """
+    id_column, name_column, tsv_column = SEARCH_TARGETS[table]
+    query = sql.SQL("""
+        SELECT {id}, {name}, ts_rank({tsv}, q) AS score
+        FROM {table}, websearch_to_tsquery('simple', %s) q
+        WHERE {tsv} @@ q
+        ORDER BY score DESC, {id}
+        LIMIT %s
+    """).format(
+        id=sql.Identifier(id_column),
+        name=sql.Identifier(name_column),
+        tsv=sql.Identifier(tsv_column),
+        table=sql.Identifier(table)
+    )
+    config = load_config()
+    matches = []
+
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, (text, limit))
+                matches = cur.fetchall()
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error searching {table}: {error}")
+
+    return matches
+
+
+def search_vendors(text, limit=10):
+    """ Find vendors whose name matches the text """
+    return [{'vendor_id': row[0], 'vendor_name': row[1], 'score': row[2]}
+            for row in search_names('vendors', text, limit)]
+
+
+def search_parts(text, limit=10):
+    """ Find parts whose name matches the text """
+    return [{'part_id': row[0], 'part_name': row[1], 'score': row[2]}
+            for row in search_names('parts', text, limit)]
+
+
+# 사용 예시:
+if __name__ == '__main__':
+    create_search_indexes_from_file()
+
+    for vendor in search_vendors('murata'):
+        print(f"ID: {vendor['vendor_id']}, Name: {vendor['vendor_name']}, Score: {vendor['score']:.2f}")
+    for part in search_parts('trans'):
+        print(f"ID: {part['part_id']}, Name: {part['part_name']}, Score: {part['score']:.2f}")
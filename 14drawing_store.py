@@ -0,0 +1,223 @@
+import hashlib
+import random
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import psycopg2
+import psycopg2.errors
+from psycopg2.extras import execute_values
+from config import load_config
+from router import get_router
+from drawing_codec import encode, decode, default_codec
+
+# a transaction that failed with one of these can simply be run again
+RETRY_ERRORS = (psycopg2.errors.DeadlockDetected, psycopg2.errors.SerializationFailure)
+
+
+def create_drawing_store_from_file():
+    """ Create drawing_blobs and migrate part_drawings to reference it """
+    sql_file = 'drawing_blobs.sql'
+    config = load_config()
+
+    try:
+        with open(sql_file, 'r') as file:
+            sql = file.read()
+
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                conn.commit()
+                print("Drawing store created successfully")
+
+    except FileNotFoundError:
+        print(f"SQL file not found: {sql_file}")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error creating drawing store: {error}")
+
+
+def drawing_hash(drawing_data):
+    """ SHA-256 digest identifying the drawing content """
+    return hashlib.sha256(drawing_data).digest()
+
+
+def missing_hashes(cur, hashes):
+    """ Ask the server which of the hashes it does not have yet """
+    cur.execute("SELECT blob_hash FROM drawing_blobs WHERE blob_hash = ANY(%s::bytea[])",
+                (list(hashes),))
+    known = {bytes(row[0]) for row in cur.fetchall()}
+    return [h for h in hashes if h not in known]
+
+
+def upload_drawings_with_cursor(cur, drawings, codec=None, pool=None, chunk_size=500, known=None, linked=None):
+    """ Upload drawings on an open cursor, sending only content the server lacks
+
+    drawings is a list of (part_id, file_extension, drawing_data) tuples.
+    With a codec ('zstd', 'zlib') new blobs are compressed with drawing_codec
+    on the thread pool while the previous chunk is being sent; codec=None
+    stores them uncompressed. Returns the number of blobs actually sent.
+
+    Blobs are inserted in hash order and links in part_id order, so
+    concurrent uploads take their locks in the same order instead of
+    deadlocking on shared drawings. known is an optional set of hashes
+    already committed, which are not even looked up; the hashes this call
+    links are added to linked.
+    """
+    sent = 0
+    pending = None
+    # hashes queued by an earlier chunk are not committed yet, so the server
+    # would still report them missing
+    queued = set()
+
+    # one row per part: the last drawing given for a part wins
+    latest = {part_id: (file_extension, drawing_data) for part_id, file_extension, drawing_data in drawings}
+    hashed = sorted((drawing_hash(drawing_data), part_id, file_extension, drawing_data)
+                    for part_id, (file_extension, drawing_data) in latest.items())
+
+    for start in range(0, len(hashed), chunk_size):
+        blobs = {}
+        links = []
+        for blob_hash, part_id, file_extension, drawing_data in hashed[start:start + chunk_size]:
+            blobs[blob_hash] = drawing_data
+            links.append((part_id, file_extension, blob_hash))
+
+        # hash first: only the hashes go over the wire for known drawings
+        candidates = [h for h in blobs if h not in queued and (known is None or h not in known)]
+        to_send = missing_hashes(cur, candidates) if candidates else []
+        queued.update(to_send)
+        if linked is not None:
+            linked.update(blobs)
+        if pool is not None:
+            encoded = [(h, len(blobs[h]), pool.submit(encode, blobs[h], codec)) for h in to_send]
+        else:
+            encoded = [(h, len(blobs[h]), encode(blobs[h], codec)) for h in to_send]
+
+        if pending is not None:
+            write_drawings(cur, *pending)
+        pending = (encoded, sorted(links))
+        sent += len(to_send)
+
+    if pending is not None:
+        write_drawings(cur, *pending)
+
+    return sent
+
+
+def write_drawings(cur, encoded, links):
+    """ Insert encoded blobs and point part_drawings at them """
+    if encoded:
+        execute_values(cur, """
+            INSERT INTO drawing_blobs(blob_hash, size, drawing_data)
+            VALUES %s
+            ON CONFLICT (blob_hash) DO NOTHING
+        """, [(h, size, data.result() if isinstance(data, Future) else data)
+              for h, size, data in encoded])
+
+    execute_values(cur, """
+        INSERT INTO part_drawings(part_id, file_extension, blob_hash)
+        VALUES %s
+        ON CONFLICT (part_id) DO UPDATE
+            SET file_extension = EXCLUDED.file_extension,
+                blob_hash = EXCLUDED.blob_hash
+    """, links)
+
+
+def commit_drawings(conn, drawings, codec=None, pool=None, attempts=3, known=None):
+    """ Upload drawings on conn and commit, running the transaction again on deadlock
+
+    Returns the number of blobs sent by the attempt that committed. With a
+    known set shared between writers, the committed hashes are added to it
+    so later uploads skip them without asking the server.
+    """
+    for attempt in range(1, attempts + 1):
+        linked = set()
+        try:
+            with conn.cursor() as cur:
+                sent = upload_drawings_with_cursor(cur, drawings, codec, pool, known=known, linked=linked)
+            conn.commit()
+            if known is not None:
+                known.update(linked)
+            return sent
+        except RETRY_ERRORS as error:
+            conn.rollback()
+            if attempt == attempts:
+                raise
+            print(f"Retrying drawing upload after {type(error).__name__} (attempt {attempt})")
+            time.sleep(random.uniform(0, 0.1 * attempt))
+
+
+def upload_drawings(drawings, codec=None, max_workers=None):
+    """ Upload part drawings, compressed if a codec is given, skipping bytes the server already has """
+    router = get_router()
+    sent = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            with router.connect_write() as conn:
+                sent = commit_drawings(conn, drawings, codec, pool)
+                router.note_write(conn)
+                print(f"Uploaded {len(drawings)} drawings, sent {sent} new blobs")
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error uploading drawings: {error}")
+
+    return sent
+
+
+def get_drawing(part_id):
+    """ Get (file_extension, drawing_data) for a part, or None """
+    sql = """
+        SELECT pd.file_extension, b.drawing_data
+        FROM part_drawings pd
+            JOIN drawing_blobs b ON b.blob_hash = pd.blob_hash
+        WHERE pd.part_id = %s
+    """
+    router = get_router()
+    drawing = None
+
+    try:
+        with router.connect_read() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (part_id,))
+                row = cur.fetchone()
+                if row:
+                    drawing = (row[0], decode(row[1]))
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error getting drawing: {error}")
+
+    return drawing
+
+
+def delete_orphan_blobs():
+    """ Remove blobs that no part drawing references any more """
+    sql = """
+        DELETE FROM drawing_blobs b
+        WHERE NOT EXISTS (SELECT 1 FROM part_drawings pd
+                          WHERE pd.blob_hash = b.blob_hash)
+    """
+    router = get_router()
+    deleted = 0
+
+    try:
+        with router.connect_write() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                deleted = cur.rowcount
+            conn.commit()
+            print(f"Deleted {deleted} unreferenced drawing blobs")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error deleting drawing blobs: {error}")
+
+    return deleted
+
+
+# 사용 예시:
+if __name__ == '__main__':
+    create_drawing_store_from_file()
+
+    # the same standard drawing shared by two parts is only sent once
+    standard = b'standard screw drawing'
+    upload_drawings([
+        (1, 'png', standard),
+        (2, 'png', standard),
+    ], codec=default_codec())
+    print(get_drawing(1))
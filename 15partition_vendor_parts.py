@@ -0,0 +1,217 @@
+import importlib
+import json
+import re
+
+import psycopg2
+from config import load_config
+
+# the table DDL is shared with create_tables(partitions=...)
+transaction = importlib.import_module('06transaction')
+
+MIRROR_SQL = """
+CREATE OR REPLACE FUNCTION vendor_parts_mirror()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM vendor_parts_new
+        WHERE vendor_id = OLD.vendor_id AND part_id = OLD.part_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO vendor_parts_new(vendor_id, part_id)
+        VALUES (NEW.vendor_id, NEW.part_id)
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS vendor_parts_mirror ON vendor_parts;
+CREATE TRIGGER vendor_parts_mirror
+    AFTER INSERT OR UPDATE OR DELETE ON vendor_parts
+    FOR EACH ROW EXECUTE FUNCTION vendor_parts_mirror();
+"""
+
+# Copy one batch in key order. FOR SHARE keeps the copied rows from being
+# deleted until the batch commits; later deletes reach the new table
+# through the mirror trigger.
+COPY_BATCH_SQL = """
+WITH batch AS (
+    SELECT vendor_id, part_id
+    FROM vendor_parts
+    WHERE (vendor_id, part_id) > (%s, %s)
+    ORDER BY vendor_id, part_id
+    LIMIT %s
+    FOR SHARE
+),
+copied AS (
+    INSERT INTO vendor_parts_new(vendor_id, part_id)
+    SELECT vendor_id, part_id FROM batch
+    ON CONFLICT DO NOTHING
+)
+SELECT vendor_id, part_id, count(*) OVER ()
+FROM batch
+ORDER BY vendor_id DESC, part_id DESC
+LIMIT 1
+"""
+
+# queries that filter vendor_parts by vendor and must touch a single partition
+PRUNING_QUERIES = {
+    'get_parts_by_vendor': """
+        SELECT parts.part_id, parts.part_name
+        FROM parts
+        INNER JOIN vendor_parts ON vendor_parts.part_id = parts.part_id
+        WHERE vendor_id = $1
+    """,
+    'vendor lookup': "SELECT part_id FROM vendor_parts WHERE vendor_id = $1",
+    'link delete': "DELETE FROM vendor_parts WHERE vendor_id = $1 AND part_id = 0",
+}
+
+
+def prepare_migration(partitions=8):
+    """ Create the partitioned vendor_parts_new and start mirroring writes into it """
+    config = load_config()
+
+    with psycopg2.connect(**config) as conn:
+        with conn.cursor() as cur:
+            for command in transaction.partitioned_vendor_parts_commands('vendor_parts_new', partitions):
+                cur.execute(command)
+            cur.execute(MIRROR_SQL)
+        conn.commit()
+    conn.close()
+    print(f"Created vendor_parts_new with {partitions} partitions")
+
+
+def copy_batches(batch_size=10000):
+    """ Copy existing links in small transactions so writers are never blocked long """
+    config = load_config()
+    last_key = (-1, -1)
+    copied = 0
+
+    with psycopg2.connect(**config) as conn:
+        with conn.cursor() as cur:
+            while True:
+                cur.execute(COPY_BATCH_SQL, (last_key[0], last_key[1], batch_size))
+                row = cur.fetchone()
+                conn.commit()
+                if row is None:
+                    break
+                last_key = (row[0], row[1])
+                copied += row[2]
+                print(f"Copied {copied} links (up to vendor {last_key[0]})")
+    conn.close()
+
+    return copied
+
+
+def swap_tables():
+    """ Replace vendor_parts with the partitioned copy in one short transaction """
+    config = load_config()
+
+    with psycopg2.connect(**config) as conn:
+        with conn.cursor() as cur:
+            cur.execute("LOCK TABLE vendor_parts IN ACCESS EXCLUSIVE MODE")
+            cur.execute("DROP TRIGGER vendor_parts_mirror ON vendor_parts")
+            cur.execute("DROP FUNCTION vendor_parts_mirror()")
+
+            # the definitions name vendor_parts, so after the rename they
+            # recreate the triggers (summary, change log, ...) on the new table
+            cur.execute("""
+                SELECT tgname, pg_get_triggerdef(oid) FROM pg_trigger
+                WHERE tgrelid = 'vendor_parts'::regclass AND NOT tgisinternal
+            """)
+            triggers = cur.fetchall()
+            for name, _ in triggers:
+                cur.execute(f"DROP TRIGGER {name} ON vendor_parts")
+
+            cur.execute("ALTER TABLE vendor_parts RENAME TO vendor_parts_old")
+            cur.execute("ALTER TABLE vendor_parts_new RENAME TO vendor_parts")
+            cur.execute("ALTER INDEX vendor_parts_new_part_id_idx RENAME TO vendor_parts_part_id_idx")
+
+            cur.execute("""
+                SELECT c.relname FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'vendor_parts'::regclass
+            """)
+            for (name,) in cur.fetchall():
+                cur.execute(f"ALTER TABLE {name} RENAME TO {name.replace('vendor_parts_new_', 'vendor_parts_')}")
+
+            for _, definition in triggers:
+                cur.execute(definition)
+        conn.commit()
+    conn.close()
+    print("vendor_parts is now partitioned; the old table is kept as vendor_parts_old")
+
+
+def scanned_partitions(plan):
+    """ Names of the vendor_parts partitions a JSON plan reads """
+    found = []
+
+    def walk(node):
+        name = node.get('Relation Name', '')
+        if re.fullmatch(r'vendor_parts_p\d+', name):
+            found.append(name)
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan[0]['Plan'])
+    return found
+
+
+def validate_pruning(vendor_id=1):
+    """ Check that vendor_id lookups read exactly one partition
+
+    Plans are checked both as custom plans (plain queries) and as generic
+    plans, which is what the plpgsql function and procedure end up using.
+    """
+    config = load_config()
+    ok = True
+
+    with psycopg2.connect(**config) as conn:
+        with conn.cursor() as cur:
+            for name, query in PRUNING_QUERIES.items():
+                for mode in ('force_custom_plan', 'force_generic_plan'):
+                    cur.execute(f"SET LOCAL plan_cache_mode = {mode}")
+                    cur.execute(f"PREPARE pruning_check(int) AS {query}")
+                    cur.execute("EXPLAIN (FORMAT JSON) EXECUTE pruning_check(%s)", (vendor_id,))
+                    plan = cur.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    cur.execute("DEALLOCATE pruning_check")
+
+                    partitions = scanned_partitions(plan)
+                    status = 'OK' if len(partitions) == 1 else 'NOT PRUNED'
+                    ok = ok and len(partitions) == 1
+                    print(f"{name:<22} {mode:<20} {status:<11} {', '.join(partitions)}")
+        conn.rollback()
+    conn.close()
+
+    return ok
+
+
+def drop_old_table():
+    """ Drop vendor_parts_old once the partitioned table has been checked """
+    config = load_config()
+
+    with psycopg2.connect(**config) as conn:
+        with conn.cursor() as cur:
+            cur.execute("DROP TABLE IF EXISTS vendor_parts_old")
+        conn.commit()
+    conn.close()
+    print("Dropped vendor_parts_old")
+
+
+def migrate_vendor_parts(partitions=8, batch_size=10000):
+    """ Move vendor_parts to a hash-partitioned table while it stays in use """
+    try:
+        prepare_migration(partitions)
+        copy_batches(batch_size)
+        swap_tables()
+        return validate_pruning()
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error partitioning vendor_parts: {error}")
+        return False
+
+
+# 사용 예시:
+if __name__ == '__main__':
+    migrate_vendor_parts(partitions=8)
@@ -0,0 +1,276 @@
+import csv
+import importlib
+import io
+import os
+import time
+from itertools import islice
+
+import psycopg2
+from psycopg2 import sql
+from batch_insert import BatchReport
+from router import get_router
+
+# sequences are moved past merged ids the same way the CSV loader does it
+csv_loader = importlib.import_module('11csv_loader')
+
+# table -> (key column, value column)
+MERGE_TABLES = {
+    'vendors': ('vendor_id', 'vendor_name'),
+    'parts': ('part_id', 'part_name'),
+}
+# table -> unique index on its value column (vendor_upsert.sql)
+UNIQUE_VALUE_INDEXES = {
+    'vendors': 'vendors_vendor_name_key',
+}
+UNIQUE_VIOLATION = '23505'
+# outcome of a feed key over all chunks; the lowest code wins, so a key
+# inserted by one chunk and renamed by a later one still counts as inserted
+OUTCOMES = {'inserted': 1, 'updated': 2, 'rejected': 3, 'unchanged': 4}
+
+
+def copy_rows(cur, staging, rows):
+    """ COPY one chunk of (key, value) rows into the staging table """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for key, value in rows:
+        writer.writerow((key, value))
+    buffer.seek(0)
+
+    cur.copy_expert(sql.SQL("COPY {} (key, value) FROM STDIN WITH (FORMAT csv)")
+                    .format(sql.Identifier(staging)), buffer)
+    return cur.rowcount
+
+
+def dedupe_chunk(cur, staging):
+    """ Keep only the last staged row of each key; returns the number of keys """
+    cur.execute(sql.SQL("""
+        DELETE FROM {staging} s
+        USING {staging} later
+        WHERE later.key = s.key AND later.line > s.line
+    """).format(staging=sql.Identifier(staging)))
+    cur.execute(sql.SQL("SELECT count(*) FROM {}").format(sql.Identifier(staging)))
+    return cur.fetchone()[0]
+
+
+def reject_taken_values(cur, table, staging, feed_keys, report):
+    """ Take staged rows that would break the unique value index out of the chunk
+
+    A value held by another key in the table, or by an earlier row of the
+    chunk, is rejected into report instead of failing the whole upsert.
+    Renames that swap values between keys are rejected too.
+    """
+    key_column, value_column = MERGE_TABLES[table]
+    cur.execute(sql.SQL("""
+        SELECT s.line, s.key, s.value,
+               (SELECT t.{key} FROM {table} t
+                WHERE t.{value} = s.value AND t.{key} <> s.key LIMIT 1) AS holder
+        FROM {staging} s
+        WHERE EXISTS (SELECT 1 FROM {table} t WHERE t.{value} = s.value AND t.{key} <> s.key)
+           OR EXISTS (SELECT 1 FROM {staging} o WHERE o.value = s.value AND o.line < s.line)
+        ORDER BY s.line
+    """).format(
+        table=sql.Identifier(table),
+        key=sql.Identifier(key_column),
+        value=sql.Identifier(value_column),
+        staging=sql.Identifier(staging)
+    ))
+    rejected = cur.fetchall()
+    if not rejected:
+        return 0
+
+    for line, key, value, holder in rejected:
+        if holder is None:
+            message = f"{value_column} repeated in the feed"
+        else:
+            message = f"{value_column} already used by {key_column} {holder}"
+        # line counts feed rows from 1; positions count from 0 like batch_insert
+        report.rejected.append((line - 1, (key, value), UNIQUE_VIOLATION, message))
+
+    cur.execute(sql.SQL("DELETE FROM {} WHERE line = ANY(%s)").format(sql.Identifier(staging)),
+                ([line for line, _, _, _ in rejected],))
+    record_outcomes(cur, feed_keys, [key for _, key, _, _ in rejected], OUTCOMES['rejected'])
+    return len(rejected)
+
+
+def record_outcomes(cur, feed_keys, keys, outcome):
+    """ Record the outcome of keys, keeping the strongest one per key """
+    cur.execute(sql.SQL("""
+        INSERT INTO {feed_keys} AS f (key, outcome)
+        SELECT key, %s FROM unnest(%s::int[]) AS key
+        ON CONFLICT (key) DO UPDATE SET outcome = least(f.outcome, EXCLUDED.outcome)
+    """).format(feed_keys=sql.Identifier(feed_keys)), (outcome, keys))
+
+
+def apply_chunk(cur, table, staging, feed_keys):
+    """ Upsert the staged chunk in a single statement, returning (inserted, updated)
+
+    The outcome of every staged key is recorded in feed_keys.
+    """
+    key_column, value_column = MERGE_TABLES[table]
+    # xmax = 0 only for freshly inserted rows; unchanged rows are filtered
+    # by the WHERE clause and do not come back at all
+    merge_sql = sql.SQL("""
+        WITH upserted AS (
+            INSERT INTO {table} AS t ({key}, {value})
+            SELECT key, value
+            FROM {staging}
+            ON CONFLICT ({key}) DO UPDATE
+                SET {value} = EXCLUDED.{value}
+                WHERE t.{value} IS DISTINCT FROM EXCLUDED.{value}
+            RETURNING t.{key} AS key, (xmax = 0) AS inserted
+        ),
+        outcomes AS (
+            INSERT INTO {feed_keys} AS f (key, outcome)
+            SELECT s.key, CASE WHEN u.inserted THEN %(inserted)s
+                               WHEN NOT u.inserted THEN %(updated)s
+                               ELSE %(unchanged)s END
+            FROM {staging} s
+                LEFT JOIN upserted u ON u.key = s.key
+            ON CONFLICT (key) DO UPDATE SET outcome = least(f.outcome, EXCLUDED.outcome)
+        )
+        SELECT count(*) FILTER (WHERE inserted),
+               count(*) FILTER (WHERE NOT inserted)
+        FROM upserted
+    """).format(
+        table=sql.Identifier(table),
+        key=sql.Identifier(key_column),
+        value=sql.Identifier(value_column),
+        staging=sql.Identifier(staging),
+        feed_keys=sql.Identifier(feed_keys)
+    )
+    cur.execute(merge_sql, OUTCOMES)
+    return cur.fetchone()
+
+
+def delete_missing(cur, table, feed_keys):
+    """ Delete rows whose key did not appear anywhere in the feed """
+    key_column, _ = MERGE_TABLES[table]
+    cur.execute(sql.SQL("""
+        DELETE FROM {table} t
+        WHERE NOT EXISTS (SELECT 1 FROM {feed_keys} f WHERE f.key = t.{key})
+    """).format(
+        table=sql.Identifier(table),
+        feed_keys=sql.Identifier(feed_keys),
+        key=sql.Identifier(key_column)
+    ))
+    return cur.rowcount
+
+
+def merge_feed(table, rows, delete_missing_rows=False, chunk_size=100000, rejected_file=None):
+    """ Sync a full feed of (id, name) rows into vendors or parts
+
+    Each chunk is COPYed into an unlogged staging table, applied with one
+    INSERT ... ON CONFLICT DO UPDATE and truncated, so every chunk only
+    scans its own rows. The outcome of every feed key is kept in a second
+    table, so a key repeated across chunks is counted once, and with
+    delete_missing_rows rows absent from the feed are deleted at the end.
+    Rows whose name is taken by another vendor are rejected, printed and
+    optionally written to rejected_file. Returns the counts of inserted,
+    updated, unchanged, rejected and deleted rows.
+    """
+    if table not in MERGE_TABLES:
+        raise ValueError(f"Cannot merge into {table}")
+
+    staging = f"{table}_staging_{os.getpid()}"
+    feed_keys = f"{table}_feed_keys_{os.getpid()}"
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'rejected': 0, 'deleted': 0}
+    report = BatchReport(table)
+    router = get_router()
+    start = time.perf_counter()
+    rows = iter(rows)
+
+    try:
+        with router.connect_write() as conn:
+            with conn.cursor() as cur:
+                # line keeps feed order, so the last value of a repeated key wins
+                cur.execute(sql.SQL("""
+                    CREATE UNLOGGED TABLE {} (
+                        line BIGSERIAL,
+                        key INTEGER NOT NULL,
+                        value VARCHAR(255) NOT NULL
+                    )
+                """).format(sql.Identifier(staging)))
+                cur.execute(sql.SQL("CREATE UNLOGGED TABLE {} (key INTEGER PRIMARY KEY, outcome SMALLINT NOT NULL)")
+                            .format(sql.Identifier(feed_keys)))
+                unique_values = False
+                if table in UNIQUE_VALUE_INDEXES:
+                    cur.execute("SELECT to_regclass(%s) IS NOT NULL", (UNIQUE_VALUE_INDEXES[table],))
+                    unique_values = cur.fetchone()[0]
+                conn.commit()
+
+                try:
+                    chunk = 0
+                    while True:
+                        batch = list(islice(rows, chunk_size))
+                        if not batch:
+                            break
+
+                        staged = copy_rows(cur, staging, batch)
+                        dedupe_chunk(cur, staging)
+                        rejected = 0
+                        if unique_values:
+                            rejected = reject_taken_values(cur, table, staging, feed_keys, report)
+                        inserted, updated = apply_chunk(cur, table, staging, feed_keys)
+                        cur.execute(sql.SQL("TRUNCATE {}").format(sql.Identifier(staging)))
+                        conn.commit()
+
+                        chunk += 1
+                        print(f"Chunk {chunk}: {staged} rows, {inserted} inserted, {updated} updated, "
+                              f"{rejected} rejected")
+
+                    cur.execute(sql.SQL("SELECT outcome, count(*) FROM {} GROUP BY outcome")
+                                .format(sql.Identifier(feed_keys)))
+                    totals = dict(cur.fetchall())
+                    for name, outcome in OUTCOMES.items():
+                        counts[name] = totals.get(outcome, 0)
+                    counts['rejected'] = len(report.rejected)
+
+                    if delete_missing_rows:
+                        counts['deleted'] = delete_missing(cur, table, feed_keys)
+                        conn.commit()
+                finally:
+                    conn.rollback()
+                    cur.execute(sql.SQL("DROP TABLE IF EXISTS {}, {}")
+                                .format(sql.Identifier(staging), sql.Identifier(feed_keys)))
+                    conn.commit()
+
+            router.note_write(conn)
+        conn.close()
+
+        csv_loader.reset_sequences([table])
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error merging {table}: {error}")
+
+    report.print_rejected()
+    if rejected_file and report.rejected:
+        report.write_rejected_csv(rejected_file)
+
+    elapsed = time.perf_counter() - start
+    print(f"Merged {table} in {elapsed:.2f}s: {counts}")
+    return counts
+
+
+def read_feed_csv(path):
+    """ Read (id, name) rows from a CSV file with a header, like data/vendors.csv """
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        for row in reader:
+            yield int(row[0]), row[1]
+
+
+def merge_vendors(rows, delete_missing_rows=False, chunk_size=100000, rejected_file=None):
+    """ Sync a vendor feed of (vendor_id, vendor_name) rows """
+    return merge_feed('vendors', rows, delete_missing_rows, chunk_size, rejected_file)
+
+
+def merge_parts(rows, delete_missing_rows=False, chunk_size=100000):
+    """ Sync a part feed of (part_id, part_name) rows """
+    return merge_feed('parts', rows, delete_missing_rows, chunk_size)
+
+
+# 사용 예시:
+if __name__ == '__main__':
+    merge_vendors(read_feed_csv('data/vendors.csv'))
+    merge_parts(read_feed_csv('data/parts.csv'))
@@ -0,0 +1,335 @@
+import importlib
+import json
+import os
+import select
+import socket
+import threading
+
+import pandas as pd
+import psycopg2
+import psycopg2.extensions
+from config import load_config
+from router import get_router
+
+PartsDatabase = importlib.import_module('03withpandas').PartsDatabase
+
+# mirrored table -> key columns
+MIRROR_TABLES = {
+    'vendors': ['vendor_id'],
+    'parts': ['part_id'],
+    'vendor_parts': ['vendor_id', 'part_id'],
+}
+CHANNEL = 'catalogue_changes'
+POSITION_FILE = 'position.json'
+
+
+def create_change_log_from_file():
+    """ Create the change log table and its triggers from SQL file """
+    sql_file = 'catalogue_changes.sql'
+    config = load_config()
+
+    try:
+        with open(sql_file, 'r') as file:
+            sql = file.read()
+
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                conn.commit()
+                print("Change log created successfully")
+
+    except FileNotFoundError:
+        print(f"SQL file not found: {sql_file}")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error creating change log: {error}")
+
+
+def prune_change_log(keep='1 day'):
+    """ Delete change log rows older than keep that every consumer has read
+
+    Registered consumers (saved mirrors and adjacency indexes) hold on to
+    the changes they have not consumed yet, so a lagging consumer never
+    misses one; drop_consumer() releases a consumer that is gone for good.
+    """
+    config = load_config()
+    deleted = 0
+
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    DELETE FROM catalogue_changes c
+                    WHERE c.changed_at < now() - %s::interval
+                      AND NOT EXISTS (SELECT 1 FROM catalogue_consumers k
+                                      WHERE c.change_id > k.last_change_id
+                                         OR c.xid = ANY(k.pending_xids))
+                """, (keep,))
+                deleted = cur.rowcount
+            conn.commit()
+        conn.close()
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error pruning change log: {error}")
+
+    return deleted
+
+
+def read_position(cur):
+    """ Change log position of the current snapshot: (last change_id, pending xids)
+
+    A change committed after the snapshot either belongs to a transaction
+    that was still running (pending) or got a higher change_id, because
+    change_ids are drawn after the writing transaction gets its xid.
+    """
+    cur.execute("""
+        SELECT coalesce(max(change_id), 0),
+               ARRAY(SELECT x::text FROM pg_snapshot_xip(pg_current_snapshot()) x)
+        FROM catalogue_changes
+    """)
+    last_change_id, pending = cur.fetchone()
+    return last_change_id, list(pending)
+
+
+def read_changes(cur, last_change_id, pending):
+    """ Read the changes committed since the position (last_change_id, pending)
+
+    Returns the (table_name, op, row_data) changes in change_id order and
+    the new position. Only new changes are transferred, however long a
+    transaction stays open. cur must be on an autocommit connection.
+    """
+    # the position and the changes must come from the same snapshot
+    cur.execute("BEGIN ISOLATION LEVEL REPEATABLE READ READ ONLY")
+    try:
+        new_last_change_id, new_pending = read_position(cur)
+        cur.execute("""
+            SELECT table_name, op, row_data
+            FROM catalogue_changes
+            WHERE change_id > %s OR xid = ANY(%s::xid8[])
+            ORDER BY change_id
+        """, (last_change_id, pending))
+        changes = cur.fetchall()
+    finally:
+        cur.execute("COMMIT")
+
+    return changes, max(last_change_id, new_last_change_id), new_pending
+
+
+def register_consumer(consumer, last_change_id, pending):
+    """ Record how far a saved consumer has read, so pruning keeps the rest """
+    conn = get_router().connect_write()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO catalogue_consumers(consumer, last_change_id, pending_xids)
+                VALUES (%s, %s, %s::xid8[])
+                ON CONFLICT (consumer) DO UPDATE
+                    SET last_change_id = EXCLUDED.last_change_id,
+                        pending_xids = EXCLUDED.pending_xids,
+                        updated_at = now()
+            """, (consumer, last_change_id, pending))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def is_registered(consumer):
+    """ Whether the change log still keeps changes for consumer """
+    conn = get_router().connect_write()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM catalogue_consumers WHERE consumer = %s", (consumer,))
+            registered = cur.fetchone() is not None
+        conn.rollback()
+    finally:
+        conn.close()
+    return registered
+
+
+def drop_consumer(consumer):
+    """ Stop keeping changes for a consumer; it has to snapshot again """
+    conn = get_router().connect_write()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM catalogue_consumers WHERE consumer = %s", (consumer,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def consumer_name(kind, folder):
+    """ Stable consumer name for state saved in folder on this host """
+    return f"{kind} {socket.gethostname()}:{os.path.abspath(folder)}"
+
+
+class CatalogueMirror(PartsDatabase):
+    """ PartsDatabase kept in sync with PostgreSQL through the change log
+
+    The position is the last change_id read plus the transactions that
+    were still running then; each poll reads the changes above that
+    change_id and those of the pending transactions once they commit, so a
+    transaction that commits late is never skipped. Row locks make changes
+    to the same key commit in change_id order, so applying them as
+    upserts/deletes by key in that order is safe.
+
+    A mirror with a folder registers the position it saved as a change log
+    consumer, so prune_change_log() keeps what it has not read yet.
+    """
+
+    def __init__(self, folder=None):
+        super().__init__()
+        self.folder = folder
+        self.last_change_id = None
+        self.pending = []
+        self.applied = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def consumer(self):
+        return consumer_name('mirror', self.folder) if self.folder else None
+
+    def snapshot(self):
+        """ Load vendors, parts and vendor_parts from one consistent snapshot """
+        # the primary, so the snapshot and the change log agree
+        conn = get_router().connect_write()
+        try:
+            conn.set_session(isolation_level=psycopg2.extensions.ISOLATION_LEVEL_REPEATABLE_READ,
+                             readonly=True)
+            with conn.cursor() as cur:
+                # the first statement fixes the snapshot the tables are read from
+                self.last_change_id, self.pending = read_position(cur)
+
+                for table, keys in MIRROR_TABLES.items():
+                    columns = list(getattr(self, table).columns)
+                    cur.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY {', '.join(keys)}")
+                    setattr(self, table, pd.DataFrame(cur.fetchall(), columns=columns))
+                self.enforce_dtypes()
+            conn.rollback()
+        finally:
+            conn.close()
+
+        print(f"Snapshot loaded at change {self.last_change_id}")
+
+    def fetch_changes(self, cur):
+        """ Read changes committed since the position, returning them and the new position """
+        changes, last_change_id, pending = read_changes(cur, self.last_change_id, self.pending)
+        return changes, (last_change_id, pending)
+
+    def apply_changes(self, changes):
+        """ Apply logged changes table by table with vectorized merges """
+        by_table = {}
+        for table, op, row in changes:
+            if table in MIRROR_TABLES:
+                by_table.setdefault(table, []).append((op, row))
+
+        for table, table_changes in by_table.items():
+            keys = MIRROR_TABLES[table]
+            frame = getattr(self, table)
+            columns = list(frame.columns)
+
+            # only the last change of each key matters
+            log = pd.DataFrame([row for _, row in table_changes])
+            log['_op'] = [op for op, _ in table_changes]
+            log = log.drop_duplicates(subset=keys, keep='last')
+
+            index = pd.MultiIndex.from_frame(frame[keys].astype('int64'))
+            changed = pd.MultiIndex.from_frame(log[keys].astype('int64'))
+            kept = frame[~index.isin(changed)]
+            inserted = log.loc[log['_op'] == 'I', columns]
+
+            setattr(self, table, pd.concat([kept, inserted], ignore_index=True))
+            self.enforce_dtypes(table)
+
+        self.applied += len(changes)
+
+    def poll(self, cur):
+        """ Fetch and apply pending changes, returning how many were applied """
+        changes, (self.last_change_id, self.pending) = self.fetch_changes(cur)
+        if changes:
+            self.apply_changes(changes)
+        return len(changes)
+
+    def save(self):
+        """ Save the mirror and its position so a restart can resume """
+        folder = self.folder or 'data/'
+        self.save_all(folder)
+        with open(os.path.join(folder, POSITION_FILE), 'w') as file:
+            json.dump({'last_change_id': self.last_change_id, 'pending': self.pending}, file)
+        if self.consumer:
+            register_consumer(self.consumer, self.last_change_id, self.pending)
+
+    def resume_or_snapshot(self):
+        """ Load the saved mirror if the change log still has its changes, otherwise take a snapshot """
+        path = os.path.join(self.folder or 'data/', POSITION_FILE)
+        state = {}
+        if self.folder and os.path.exists(path):
+            with open(path) as file:
+                state = json.load(file)
+
+        if 'last_change_id' in state and is_registered(self.consumer):
+            self.load_all(self.folder)
+            self.last_change_id = state['last_change_id']
+            self.pending = state['pending']
+            print(f"Resuming from change {self.last_change_id}")
+        else:
+            self.snapshot()
+            if self.consumer:
+                self.save()
+
+    def run(self, poll_seconds=5.0, save_every=100):
+        """ Apply changes as notifications arrive until stop() is called
+
+        Notifications only wake the loop; it also polls every poll_seconds to
+        pick up transactions that finished after their notification.
+        """
+        self.resume_or_snapshot()
+        # LISTEN only works on the primary
+        conn = get_router().connect_write()
+        conn.autocommit = True
+        polls = 0
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANNEL}")
+                self.poll(cur)
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], poll_seconds) != ([], [], []):
+                        conn.poll()
+                        conn.notifies.clear()
+                    self.poll(cur)
+
+                    polls += 1
+                    if self.folder and polls % save_every == 0:
+                        self.save()
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(f"Catalogue mirror stopped: {error}")
+        finally:
+            conn.close()
+            if self.folder:
+                self.save()
+
+    def start(self, poll_seconds=5.0):
+        """ Run the sync loop in a background thread """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, args=(poll_seconds,), daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """ Stop the background sync loop and wait for it """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+# 사용 예시:
+if __name__ == '__main__':
+    create_change_log_from_file()
+
+    mirror = CatalogueMirror(folder='data/')
+    mirror.start(poll_seconds=1.0)
+    try:
+        threading.Event().wait(10)
+    finally:
+        mirror.stop()
+    mirror.print_all()
@@ -0,0 +1,333 @@
+import importlib
+import io
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import psycopg2
+import psycopg2.extensions
+from router import get_router
+
+# the change log position handling is shared with the catalogue mirror
+mirror = importlib.import_module('17catalogue_mirror')
+
+ARRAYS = (
+    'vendor_ids', 'vendor_indptr', 'vendor_parts',
+    'part_ids', 'part_indptr', 'part_vendors',
+    'vendor_name_ids', 'vendor_name_offsets', 'vendor_name_bytes',
+    'part_name_ids', 'part_name_offsets', 'part_name_bytes',
+)
+META_FILE = 'meta.json'
+
+
+def copy_query(cur, query, columns, dtypes):
+    """ Stream a query result with COPY into a DataFrame """
+    buffer = io.StringIO()
+    cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv)", buffer)
+    buffer.seek(0)
+    return pd.read_csv(buffer, header=None, names=columns, dtype=dtypes, keep_default_na=False)
+
+
+def build_csr(keys, values):
+    """ CSR arrays grouping values by key: (unique keys, indptr, values sorted per key) """
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    indptr = np.zeros(len(unique_keys) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return unique_keys, indptr, values
+
+
+def pair_codes(keys, values):
+    """ (key, value) pairs of non-negative int32s as single int64s, for np.isin """
+    return (np.asarray(keys, dtype=np.int64) << 32) | np.asarray(values, dtype=np.int64)
+
+
+def splice_csr(ids, indptr, values, new_ids, new_indptr, new_values, touched):
+    """ Replace the segments of the touched keys with those of the new CSR arrays
+
+    Untouched segments are copied as they are, so the cost is one pass over
+    the arrays instead of a sort; touched keys missing from new_ids are
+    dropped. Name arrays (ids, offsets, bytes) have the same layout.
+    """
+    ids, indptr, values = np.asarray(ids), np.asarray(indptr), np.asarray(values)
+    keep = ~np.isin(ids, touched)
+    all_ids = np.concatenate([ids[keep], np.asarray(new_ids, dtype=ids.dtype)])
+    starts = np.concatenate([indptr[:-1][keep], new_indptr[:-1] + len(values)])
+    counts = np.concatenate([np.diff(indptr)[keep], np.diff(new_indptr)])
+    source = np.concatenate([values, np.asarray(new_values, dtype=values.dtype)])
+
+    # both id lists are already sorted, so the stable sort only merges them
+    order = np.argsort(all_ids, kind='stable')
+    all_ids, starts, counts = all_ids[order], starts[order], counts[order]
+    out_indptr = np.zeros(len(all_ids) + 1, dtype=np.int64)
+    np.cumsum(counts, out=out_indptr[1:])
+    take = np.arange(out_indptr[-1]) - np.repeat(out_indptr[:-1] - starts, counts)
+    return all_ids, out_indptr, source[take]
+
+
+def last_changes(changes, table):
+    """ {key tuple: (op, row)} with the last logged change of each key of table """
+    keys = mirror.MIRROR_TABLES[table]
+    latest = {}
+    for name, op, row in changes:
+        if name == table:
+            latest[tuple(row[key] for key in keys)] = (op, row)
+    return latest
+
+
+def pack_names(ids, names):
+    """ Names as sorted ids, offsets and one UTF-8 byte buffer, which can be memory-mapped """
+    order = np.argsort(ids, kind='stable')
+    encoded = [names[i].encode('utf-8') for i in order]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.array([len(name) for name in encoded], dtype=np.int64), out=offsets[1:])
+    return (np.asarray(ids, dtype=np.int32)[order], offsets,
+            np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+
+def lookup(ids, key):
+    """ Position of key in the sorted ids array, or -1 """
+    index = np.searchsorted(ids, key)
+    if index < len(ids) and ids[index] == key:
+        return int(index)
+    return -1
+
+
+class AdjacencyIndex:
+    """ In-memory vendor <-> part adjacency in compressed sparse row form
+
+    vendor_parts[vendor_indptr[i]:vendor_indptr[i + 1]] are the parts of
+    vendor vendor_ids[i], and part_vendors is the same for the other
+    direction. Lookups are a binary search and a slice, so they never touch
+    the database. The arrays are saved as .npy files and loaded with
+    mmap_mode='r', so a new process starts without parsing anything.
+    """
+
+    def __init__(self, arrays, last_change_id=None, pending=()):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.last_change_id = last_change_id
+        self.pending = list(pending)
+
+    @classmethod
+    def build(cls, links, vendors, parts, last_change_id=None, pending=()):
+        """ Build from DataFrames of vendor_parts, vendors and parts rows """
+        vendor_links = links['vendor_id'].to_numpy(dtype=np.int32)
+        part_links = links['part_id'].to_numpy(dtype=np.int32)
+
+        arrays = {}
+        arrays['vendor_ids'], arrays['vendor_indptr'], arrays['vendor_parts'] = build_csr(vendor_links, part_links)
+        arrays['part_ids'], arrays['part_indptr'], arrays['part_vendors'] = build_csr(part_links, vendor_links)
+        (arrays['vendor_name_ids'], arrays['vendor_name_offsets'],
+         arrays['vendor_name_bytes']) = pack_names(vendors['vendor_id'].to_numpy(), vendors['vendor_name'].tolist())
+        (arrays['part_name_ids'], arrays['part_name_offsets'],
+         arrays['part_name_bytes']) = pack_names(parts['part_id'].to_numpy(), parts['part_name'].tolist())
+        return cls(arrays, last_change_id, pending)
+
+    @classmethod
+    def from_database(cls):
+        """ Snapshot vendor_parts, vendors and parts with COPY in one transaction """
+        start = time.perf_counter()
+        # the primary, so the change log position matches the tables
+        conn = get_router().connect_write()
+        try:
+            conn.set_session(isolation_level=psycopg2.extensions.ISOLATION_LEVEL_REPEATABLE_READ,
+                             readonly=True)
+            with conn.cursor() as cur:
+                last_change_id, pending = mirror.read_position(cur)
+                links = copy_query(cur, "SELECT vendor_id, part_id FROM vendor_parts",
+                                   ['vendor_id', 'part_id'], 'int32')
+                vendors = copy_query(cur, "SELECT vendor_id, vendor_name FROM vendors",
+                                     ['vendor_id', 'vendor_name'], {'vendor_id': 'int32', 'vendor_name': str})
+                parts = copy_query(cur, "SELECT part_id, part_name FROM parts",
+                                   ['part_id', 'part_name'], {'part_id': 'int32', 'part_name': str})
+            conn.rollback()
+        finally:
+            conn.close()
+
+        index = cls.build(links, vendors, parts, last_change_id, pending)
+        elapsed = time.perf_counter() - start
+        print(f"Indexed {len(links)} links in {elapsed:.2f}s")
+        return index
+
+    def save(self, folder):
+        """ Write every array as .npy plus the change log position to folder
+
+        Files are written under a temporary name and moved into place:
+        arrays loaded with load() may still be memory maps of the files
+        being replaced, and truncating those would zero them.
+        """
+        os.makedirs(folder, exist_ok=True)
+        for name in ARRAYS:
+            path = os.path.join(folder, f'{name}.npy')
+            with open(f'{path}.tmp', 'wb') as file:
+                np.save(file, np.asarray(getattr(self, name)))
+            os.replace(f'{path}.tmp', path)
+
+        path = os.path.join(folder, META_FILE)
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump({'last_change_id': self.last_change_id, 'pending': self.pending}, file)
+        os.replace(f'{path}.tmp', path)
+
+    @classmethod
+    def load(cls, folder):
+        """ Memory-map a snapshot written by save() """
+        arrays = {name: np.load(os.path.join(folder, f'{name}.npy'), mmap_mode='r') for name in ARRAYS}
+        with open(os.path.join(folder, META_FILE)) as file:
+            meta = json.load(file)
+        return cls(arrays, meta.get('last_change_id'), meta.get('pending', []))
+
+    def parts_of(self, vendor_id):
+        """ Part ids supplied by vendor_id, sorted """
+        i = lookup(self.vendor_ids, vendor_id)
+        if i < 0:
+            return self.vendor_parts[:0]
+        return self.vendor_parts[self.vendor_indptr[i]:self.vendor_indptr[i + 1]]
+
+    def vendors_of(self, part_id):
+        """ Vendor ids supplying part_id, sorted """
+        i = lookup(self.part_ids, part_id)
+        if i < 0:
+            return self.part_vendors[:0]
+        return self.part_vendors[self.part_indptr[i]:self.part_indptr[i + 1]]
+
+    @staticmethod
+    def gather(ids, indptr, values, keys):
+        """ Batched CSR lookup: (offsets, values) where values[offsets[k]:offsets[k + 1]] belong to keys[k] """
+        keys = np.asarray(keys)
+        ids = np.asarray(ids)
+        if len(ids) == 0:
+            return np.zeros(len(keys) + 1, dtype=np.int64), np.asarray(values)[:0]
+
+        positions = np.searchsorted(ids, keys).clip(max=len(ids) - 1)
+        found = ids[positions] == keys
+        starts = np.where(found, indptr[positions], 0)
+        counts = np.where(found, indptr[positions + 1] - indptr[positions], 0)
+
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        # index of every output element in values, without a Python loop
+        take = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - starts, counts)
+        return offsets, np.asarray(values)[take]
+
+    def parts_of_many(self, vendor_ids):
+        """ Batched parts_of, returned as (offsets, part ids) """
+        return self.gather(self.vendor_ids, self.vendor_indptr, self.vendor_parts, vendor_ids)
+
+    def vendors_of_many(self, part_ids):
+        """ Batched vendors_of, returned as (offsets, vendor ids) """
+        return self.gather(self.part_ids, self.part_indptr, self.part_vendors, part_ids)
+
+    def vendor_name(self, vendor_id):
+        i = lookup(self.vendor_name_ids, vendor_id)
+        if i < 0:
+            return None
+        return bytes(self.vendor_name_bytes[self.vendor_name_offsets[i]:self.vendor_name_offsets[i + 1]]).decode('utf-8')
+
+    def part_name(self, part_id):
+        i = lookup(self.part_name_ids, part_id)
+        if i < 0:
+            return None
+        return bytes(self.part_name_bytes[self.part_name_offsets[i]:self.part_name_offsets[i + 1]]).decode('utf-8')
+
+    def patch_links(self, ids, indptr, values, changed, added):
+        """ CSR arrays without the changed (key, value) pairs and with the added ones
+
+        Only the segments of keys in changed are rebuilt; splice_csr copies
+        the others.
+        """
+        touched = np.unique(changed[:, 0])
+        offsets, current = self.gather(ids, indptr, values, touched)
+        keys = np.repeat(touched, np.diff(offsets))
+        drop = np.isin(pair_codes(keys, current), pair_codes(changed[:, 0], changed[:, 1]))
+        new_ids, new_indptr, new_values = build_csr(np.concatenate([keys[~drop], added[:, 0]]),
+                                                    np.concatenate([current[~drop], added[:, 1]]))
+        return splice_csr(ids, indptr, values, new_ids, new_indptr, new_values, touched)
+
+    def apply_changes(self, changes):
+        """ Patch the arrays with logged changes
+
+        Only the segments of changed vendors and parts are rebuilt; the rest
+        are copied into the new arrays in one pass, without sorting all links
+        again or reading the database.
+        """
+        links = last_changes(changes, 'vendor_parts')
+        if links:
+            changed = np.array(list(links), dtype=np.int32).reshape(-1, 2)
+            added = np.array([key for key, (op, _) in links.items() if op == 'I'],
+                             dtype=np.int32).reshape(-1, 2)
+            self.vendor_ids, self.vendor_indptr, self.vendor_parts = self.patch_links(
+                self.vendor_ids, self.vendor_indptr, self.vendor_parts, changed, added)
+            self.part_ids, self.part_indptr, self.part_vendors = self.patch_links(
+                self.part_ids, self.part_indptr, self.part_vendors, changed[:, ::-1], added[:, ::-1])
+
+        for table, prefix in (('vendors', 'vendor'), ('parts', 'part')):
+            latest = last_changes(changes, table)
+            if not latest:
+                continue
+            touched = np.array([key[0] for key in latest], dtype=np.int32)
+            inserted = [(key[0], row[f'{prefix}_name']) for key, (op, row) in latest.items() if op == 'I']
+            new = pack_names(np.array([i for i, _ in inserted], dtype=np.int32), [name for _, name in inserted])
+            names = [f'{prefix}_name_ids', f'{prefix}_name_offsets', f'{prefix}_name_bytes']
+            patched = splice_csr(*(getattr(self, name) for name in names), *new, touched)
+            for name, array in zip(names, patched):
+                setattr(self, name, array)
+
+    def refresh(self):
+        """ Catch up with the change log since the snapshot, returning the number of changes """
+        conn = get_router().connect_write()
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                changes, self.last_change_id, self.pending = mirror.read_changes(
+                    cur, self.last_change_id, self.pending)
+        finally:
+            conn.close()
+
+        if changes:
+            self.apply_changes(changes)
+        return len(changes)
+
+
+def open_index(folder='adjacency/'):
+    """ Load the saved index and catch up, or build and save a new one
+
+    The saved index is a change log consumer, so pruning keeps the changes
+    it still needs; if it was dropped (or saved by an older version) it is
+    rebuilt instead.
+    """
+    consumer = mirror.consumer_name('adjacency', folder)
+    index = None
+    if os.path.exists(os.path.join(folder, META_FILE)):
+        index = AdjacencyIndex.load(folder)
+        if index.last_change_id is None or not mirror.is_registered(consumer):
+            index = None
+        elif not index.refresh():
+            return index
+
+    if index is None:
+        index = AdjacencyIndex.from_database()
+    index.save(folder)
+    mirror.register_consumer(consumer, index.last_change_id, index.pending)
+    return index
+
+
+# 사용 예시:
+if __name__ == '__main__':
+    try:
+        index = open_index()
+
+        start = time.perf_counter()
+        parts = index.parts_of(1)
+        elapsed = (time.perf_counter() - start) * 1e6
+        print(f"Vendor 1 ({index.vendor_name(1)}) supplies {len(parts)} parts, looked up in {elapsed:.1f}us")
+        for part_id in parts[:10]:
+            print(f"Part ID: {part_id}, Name: {index.part_name(part_id)}")
+
+        offsets, vendors = index.vendors_of_many([1, 2, 3])
+        print(f"Vendors of parts 1-3: {np.split(vendors, offsets[1:-1])}")
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error building adjacency index: {error}")
@@ -0,0 +1,263 @@
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+import psycopg2
+import psycopg2.errors
+from router import get_router
+
+# Each operation runs the same statements as the project function it is
+# named after, on the worker's own connection, so errors reach the load
+# generator instead of being printed and swallowed.
+
+
+def op_get_vendors(cur, rng, context):
+    cur.execute("SELECT vendor_id, vendor_name FROM vendors ORDER BY vendor_id")
+    cur.fetchall()
+
+
+def op_get_parts(cur, rng, context):
+    cur.callproc('get_parts_by_vendor', (rng.randint(1, context['max_vendor_id']),))
+    cur.fetchall()
+
+
+def op_update_vendor(cur, rng, context):
+    vendor_id = rng.randint(1, context['max_vendor_id'])
+    cur.execute("UPDATE vendors SET vendor_name = vendor_name WHERE vendor_id = %s RETURNING vendor_id",
+                (vendor_id,))
+    cur.fetchall()
+
+
+def op_add_part(cur, rng, context):
+    cur.execute("INSERT INTO parts(part_name) VALUES(%s) RETURNING part_id",
+                (f"loadtest-{uuid.uuid4().hex[:12]}",))
+    part_id = cur.fetchone()[0]
+    vendor_ids = rng.sample(range(1, context['max_vendor_id'] + 1), min(2, context['max_vendor_id']))
+    for vendor_id in vendor_ids:
+        cur.execute("INSERT INTO vendor_parts(vendor_id, part_id) VALUES(%s, %s)", (vendor_id, part_id))
+
+
+def op_add_new_part(cur, rng, context):
+    # a small vendor name pool so concurrent calls contend on the same vendors
+    cur.execute('CALL add_new_part(%s, %s)',
+                (f"loadtest-{uuid.uuid4().hex[:12]}", f"loadtest vendor {rng.randint(1, 20)}"))
+
+
+OPERATIONS = {
+    'get_vendors': (op_get_vendors, False),
+    'get_parts': (op_get_parts, False),
+    'update_vendor': (op_update_vendor, True),
+    'add_part': (op_add_part, True),
+    'add_new_part': (op_add_new_part, True),
+}
+
+DEFAULT_MIX = 'get_vendors=30,get_parts=40,update_vendor=10,add_part=10,add_new_part=10'
+
+
+def parse_mix(mix):
+    """ Parse 'op=weight,op=weight' into a {op: weight} dict """
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name}; choose from {', '.join(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def classify(error):
+    """ Outcome name for an exception raised by an operation """
+    if isinstance(error, psycopg2.errors.DeadlockDetected):
+        return 'deadlock'
+    if isinstance(error, psycopg2.errors.SerializationFailure):
+        return 'serialization'
+    if isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+        return 'connection'
+    return 'error'
+
+
+def connect(write):
+    router = get_router()
+    return router.connect_write() if write else router.connect_read()
+
+
+def run_worker(worker_id, mix, rate, duration, context, start_at):
+    """ Run operations for duration seconds and return the measurements
+
+    With a rate, operations are scheduled every 1/rate seconds and latency
+    is measured from the scheduled start, so a stalled server shows up as
+    latency instead of silently lowering the offered load.
+    """
+    rng = random.Random(worker_id)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    connections = {}
+    records = []
+
+    time.sleep(max(0.0, start_at - time.time()))
+    start = time.perf_counter()
+    scheduled = start
+
+    while True:
+        now = time.perf_counter()
+        if now - start >= duration:
+            break
+        if rate:
+            if scheduled > now:
+                time.sleep(scheduled - now)
+            began = scheduled
+            scheduled += 1.0 / rate
+        else:
+            began = now
+
+        name = rng.choices(names, weights)[0]
+        operation, write = OPERATIONS[name]
+        outcome = 'ok'
+        try:
+            if write not in connections:
+                connections[write] = connect(write)
+            conn = connections[write]
+            with conn.cursor() as cur:
+                operation(cur, rng, context)
+            conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            outcome = classify(error)
+            conn = connections.pop(write, None)
+            if conn is not None:
+                try:
+                    conn.rollback()
+                    if outcome != 'connection':
+                        connections[write] = conn
+                    else:
+                        conn.close()
+                except psycopg2.Error:
+                    conn.close()
+
+        finished = time.perf_counter()
+        records.append((worker_id, name, began - start, finished - began, outcome))
+
+    for conn in connections.values():
+        conn.close()
+    return records
+
+
+def run_worker_args(args):
+    return run_worker(*args)
+
+
+def run_load(workers=8, mix=DEFAULT_MIX, rate=None, duration=30, use_processes=False):
+    """ Drive the mixed workload from workers threads (or processes)
+
+    rate is the target operations per second over all workers, or None to
+    run closed-loop as fast as possible. Returns a DataFrame with one row
+    per operation: worker, operation, start, latency, outcome.
+    """
+    weights = parse_mix(mix) if isinstance(mix, str) else dict(mix)
+
+    with get_router().connect_read() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT coalesce(max(vendor_id), 1) FROM vendors")
+            context = {'max_vendor_id': cur.fetchone()[0]}
+    conn.close()
+
+    per_worker_rate = rate / workers if rate else None
+    start_at = time.time() + 1.0
+    jobs = [(worker_id, weights, per_worker_rate, duration, context, start_at) for worker_id in range(workers)]
+
+    if use_processes:
+        with Pool(workers) as pool:
+            results = pool.map(run_worker_args, jobs)
+    else:
+        with ThreadPoolExecutor(workers) as executor:
+            results = list(executor.map(run_worker_args, jobs))
+
+    return pd.DataFrame([record for result in results for record in result],
+                        columns=['worker', 'operation', 'start', 'latency', 'outcome'])
+
+
+def summarize(records, duration):
+    """ Per-operation throughput, latency percentiles (ms) and error counts """
+    rows = []
+    for name, group in records.groupby('operation'):
+        ok = group.loc[group['outcome'] == 'ok', 'latency'].to_numpy() * 1000
+        p50, p95, p99 = np.percentile(ok, [50, 95, 99]) if len(ok) else (np.nan,) * 3
+        rows.append({
+            'operation': name,
+            'ops/s': len(ok) / duration,
+            'p50': p50, 'p95': p95, 'p99': p99,
+            'max': ok.max() if len(ok) else np.nan,
+            'deadlock': int((group['outcome'] == 'deadlock').sum()),
+            'serialization': int((group['outcome'] == 'serialization').sum()),
+            'connection': int((group['outcome'] == 'connection').sum()),
+            'error': int((group['outcome'] == 'error').sum()),
+        })
+    return pd.DataFrame(rows).set_index('operation')
+
+
+def timeline(records, interval=5):
+    """ Throughput and p99 latency (ms) of successful operations per interval """
+    ok = records[records['outcome'] == 'ok'].copy()
+    ok['window'] = (ok['start'] // interval * interval).astype(int)
+    grouped = ok.groupby(['window', 'operation'])['latency']
+    return pd.DataFrame({
+        'ops/s': grouped.size() / interval,
+        'p99': grouped.quantile(0.99) * 1000,
+    }).unstack('operation')
+
+
+def print_report(records, duration, interval=5):
+    """ Print the summary table and the latency timeline """
+    pd.set_option('display.width', 160)
+    print("\nPer operation (latency in ms):")
+    print(summarize(records, duration).round(2))
+    print(f"\nThroughput and p99 per {interval}s:")
+    print(timeline(records, interval).round(2))
+
+
+def find_saturation(levels=(1, 2, 4, 8, 16, 32), mix=DEFAULT_MIX, duration=20,
+                    use_processes=False, min_gain=0.1):
+    """ Run the workload at increasing concurrency until throughput stops scaling
+
+    Saturation is the first level whose throughput is less than min_gain
+    above the previous level. Returns a DataFrame of level, ops/s, p99 and
+    error counts, and the saturated level (None if it kept scaling).
+    """
+    rows = []
+    saturated = None
+
+    for level in levels:
+        records = run_load(level, mix, None, duration, use_processes)
+        ok = records['outcome'] == 'ok'
+        throughput = ok.sum() / duration
+        rows.append({
+            'workers': level,
+            'ops/s': throughput,
+            'p99': records.loc[ok, 'latency'].quantile(0.99) * 1000,
+            'errors': int((~ok).sum()),
+            'deadlocks': int((records['outcome'] == 'deadlock').sum()),
+        })
+        print(f"{level:>4} workers: {throughput:10.1f} ops/s, p99 {rows[-1]['p99']:.1f} ms, "
+              f"{rows[-1]['errors']} errors")
+
+        if len(rows) > 1 and throughput < rows[-2]['ops/s'] * (1 + min_gain):
+            saturated = rows[-2]['workers']
+            break
+
+    if saturated is not None:
+        print(f"Throughput stopped scaling after {saturated} workers")
+    return pd.DataFrame(rows).set_index('workers'), saturated
+
+
+# 사용 예시:
+if __name__ == '__main__':
+    try:
+        records = run_load(workers=8, duration=30)
+        print_report(records, duration=30)
+        find_saturation()
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error running load test: {error}")
@@ -0,0 +1,240 @@
+import importlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from router import get_router
+from drawing_codec import decode
+
+# hash-first uploads are shared with the drawing store
+drawing_store = importlib.import_module('14drawing_store')
+
+# trailing digits of the file name are the part id: 123.dxf, part_123.png
+PART_ID_PATTERN = re.compile(r'(\d+)$')
+# part_drawings.file_extension is VARCHAR(5)
+MAX_EXTENSION_LENGTH = 5
+
+
+def part_id_from_path(path):
+    """ Default mapping from a file path to its part_id, or None """
+    match = PART_ID_PATTERN.search(os.path.splitext(os.path.basename(path))[0])
+    return int(match.group(1)) if match else None
+
+
+def find_drawing_files(folder, mapper=part_id_from_path):
+    """ Walk folder and return (path, part_id, file_extension) for every drawing
+
+    Files whose part id cannot be mapped, whose extension does not fit the
+    column, or whose part already has a file are returned separately as
+    (path, reason).
+    """
+    files = []
+    skipped = []
+    seen = {}
+
+    for root, _, names in os.walk(folder):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            part_id = mapper(path)
+            file_extension = os.path.splitext(name)[1][1:].lower()
+
+            if part_id is None:
+                skipped.append((path, 'no part id'))
+            elif not file_extension or len(file_extension) > MAX_EXTENSION_LENGTH:
+                skipped.append((path, f'bad extension {file_extension!r}'))
+            elif part_id in seen:
+                skipped.append((path, f'part {part_id} already has {seen[part_id]}'))
+            else:
+                seen[part_id] = path
+                files.append((path, part_id, file_extension))
+
+    return files, skipped
+
+
+def read_file(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def read_config(router):
+    """ Connection settings of a replica that has our writes, or of the primary
+
+    Follows Router.connect_read: with read_your_writes a replica is only used
+    once it has replayed past the last write, so an export right after an
+    import sees the imported drawings.
+    """
+    lsn = router.last_write_lsn if router.read_your_writes else None
+    for config in router.replica_order():
+        if lsn is None:
+            return config
+        try:
+            conn = psycopg2.connect(**config)
+        except psycopg2.OperationalError as error:
+            print(f"Replica {config.get('host')} unavailable: {error}")
+            continue
+        try:
+            if router.caught_up(conn, lsn):
+                return config
+        finally:
+            conn.close()
+    return router.primary
+
+
+def connection_pool(connections, write=True):
+    """ Bounded pool of connections to the primary (or a replica for reads) """
+    router = get_router()
+    config = router.primary
+    if not write and router.replicas:
+        config = read_config(router)
+    return ThreadedConnectionPool(1, connections, connection_factory=router.connection_factory, **config)
+
+
+def import_drawings(folder, connections=4, read_workers=16, chunk_size=200, codec=None,
+                    mapper=part_id_from_path):
+    """ Load every drawing file under folder into part_drawings
+
+    File reads run on read_workers threads; each chunk of chunk_size files
+    is uploaded by one of connections writer threads on its own pooled
+    connection and committed on its own. At most two chunks per connection
+    are held in memory at a time. New blobs are compressed with codec, or
+    stored uncompressed when it is None. A chunk that deadlocks with another
+    is run again, and hashes committed by one chunk are not looked up or
+    sent again by later ones. Returns (imported, failed, skipped) counts.
+    """
+    files, skipped = find_drawing_files(folder, mapper)
+    for path, reason in skipped:
+        print(f"Skipped {path}: {reason}")
+
+    chunks = [files[start:start + chunk_size] for start in range(0, len(files), chunk_size)]
+    in_flight = threading.BoundedSemaphore(connections * 2)
+    totals = {'imported': 0, 'failed': 0, 'bytes': 0}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    router = get_router()
+    pool = connection_pool(connections)
+    known = set()
+
+    def upload(chunk, contents):
+        try:
+            drawings = [(part_id, file_extension, future.result())
+                        for (_, part_id, file_extension), future in zip(chunk, contents)]
+            conn = pool.getconn()
+            try:
+                drawing_store.commit_drawings(conn, drawings, codec, known=known)
+                router.note_write(conn)
+            except (Exception, psycopg2.DatabaseError):
+                conn.rollback()
+                raise
+            finally:
+                pool.putconn(conn)
+
+            with lock:
+                totals['imported'] += len(drawings)
+                totals['bytes'] += sum(len(data) for _, _, data in drawings)
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(f"Error importing {chunk[0][0]} .. {chunk[-1][0]}: {error}")
+            with lock:
+                totals['failed'] += len(chunk)
+        finally:
+            in_flight.release()
+
+    try:
+        with ThreadPoolExecutor(read_workers) as readers, ThreadPoolExecutor(connections) as writers:
+            for chunk in chunks:
+                in_flight.acquire()
+                contents = [readers.submit(read_file, path) for path, _, _ in chunk]
+                writers.submit(upload, chunk, contents)
+    finally:
+        pool.closeall()
+
+    elapsed = time.perf_counter() - start
+    megabytes = totals['bytes'] / 1e6
+    print(f"Imported {totals['imported']} drawings ({megabytes:.1f} MB) in {elapsed:.2f}s, "
+          f"{megabytes / elapsed if elapsed else 0:.1f} MB/s; {totals['failed']} failed, {len(skipped)} skipped")
+    return totals['imported'], totals['failed'], len(skipped)
+
+
+def export_drawings(folder, connections=4, write_workers=16, chunk_size=200, part_ids=None,
+                    from_primary=False):
+    """ Write part drawings to folder as <part_id>.<file_extension>
+
+    Part ids are split into chunks; each chunk is streamed with a server-side
+    cursor on one of connections pooled connections, decoded, and handed
+    to write_workers threads that write the files. from_primary reads from
+    the primary, e.g. to check an import that just finished. Returns the
+    number of files written.
+    """
+    os.makedirs(folder, exist_ok=True)
+    pool = connection_pool(connections, write=from_primary)
+    in_flight = threading.BoundedSemaphore(write_workers * 4)
+    totals = {'written': 0, 'bytes': 0}
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def write_file(path, data):
+        try:
+            with open(path, 'wb') as file:
+                file.write(data)
+            with lock:
+                totals['written'] += 1
+                totals['bytes'] += len(data)
+        finally:
+            in_flight.release()
+
+    def stream(chunk, files):
+        conn = pool.getconn()
+        try:
+            # a named cursor streams rows instead of buffering the whole chunk
+            with conn.cursor(name=f'export_{chunk[0]}') as cur:
+                cur.itersize = 50
+                cur.execute("""
+                    SELECT pd.part_id, pd.file_extension, b.drawing_data
+                    FROM part_drawings pd
+                        JOIN drawing_blobs b ON b.blob_hash = pd.blob_hash
+                    WHERE pd.part_id = ANY(%s)
+                """, (chunk,))
+                for part_id, file_extension, drawing_data in cur:
+                    in_flight.acquire()
+                    files.submit(write_file, os.path.join(folder, f'{part_id}.{file_extension}'),
+                                 decode(bytes(drawing_data)))
+            conn.rollback()
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(f"Error exporting parts {chunk[0]} .. {chunk[-1]}: {error}")
+            if not conn.closed:
+                conn.rollback()
+        finally:
+            pool.putconn(conn)
+
+    try:
+        if part_ids is None:
+            conn = pool.getconn()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT part_id FROM part_drawings ORDER BY part_id")
+                    part_ids = [row[0] for row in cur.fetchall()]
+                conn.rollback()
+            finally:
+                pool.putconn(conn)
+
+        chunks = [list(part_ids[i:i + chunk_size]) for i in range(0, len(part_ids), chunk_size)]
+        with ThreadPoolExecutor(write_workers) as files, ThreadPoolExecutor(connections) as readers:
+            for future in [readers.submit(stream, chunk, files) for chunk in chunks]:
+                future.result()
+    finally:
+        pool.closeall()
+
+    elapsed = time.perf_counter() - start
+    megabytes = totals['bytes'] / 1e6
+    print(f"Exported {totals['written']} drawings ({megabytes:.1f} MB) in {elapsed:.2f}s, "
+          f"{megabytes / elapsed if elapsed else 0:.1f} MB/s")
+    return totals['written']
+
+
+# 사용 예시:
+if __name__ == '__main__':
+    import_drawings('drawings/')
+    export_drawings('export/', from_primary=True)
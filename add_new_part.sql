@@ -12,10 +12,8 @@ BEGIN
     VALUES(new_part_name)
     RETURNING part_id INTO v_part_id;
 
-    -- insert a new vendor
-    INSERT INTO vendors(vendor_name)
-    VALUES(new_vendor_name)
-    RETURNING vendor_id INTO v_vendor_id;
+    -- reuse the vendor if it already exists (see vendor_upsert.sql)
+    v_vendor_id := get_or_create_vendor(new_vendor_name);
 
     -- insert into vendor_parts
     INSERT INTO vendor_parts(part_id, vendor_id)
@@ -0,0 +1,129 @@
+import csv
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+
+class BatchReport:
+    """ Outcome of a batch insert
+
+    returned maps the position of each inserted row to the row RETURNING
+    gave back (only with fetch=True); rejected lists (position, row,
+    sqlstate, message) for every row the database refused.
+    """
+
+    def __init__(self, table=None):
+        self.table = table
+        self.inserted = 0
+        self.statements = 0
+        self.returned = {}
+        self.rejected = []
+
+    def print_rejected(self, limit=20):
+        if not self.rejected:
+            return
+        source = f" {self.table}" if self.table else ""
+        print(f"Rejected {len(self.rejected)}{source} rows:")
+        for position, row, sqlstate, message in self.rejected[:limit]:
+            print(f"  #{position} {row}: [{sqlstate}] {message.splitlines()[0]}")
+        if len(self.rejected) > limit:
+            print(f"  ... {len(self.rejected) - limit} more")
+
+    def write_rejected_csv(self, path, append=False):
+        """ Save the rejected rows with their errors for fixing and reloading """
+        with open(path, 'a' if append else 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            if not append:
+                writer.writerow(['table', 'position', 'row', 'sqlstate', 'message'])
+            for position, row, sqlstate, message in self.rejected:
+                writer.writerow([self.table, position, list(row), sqlstate, message.strip()])
+
+
+# SQLSTATE classes caused by the data itself: 22 data exception, 23 integrity
+# constraint violation. Only these are worth bisecting.
+ROW_ERROR_CLASSES = ('22', '23')
+# Released savepoints keep their subtransaction ids until the top-level
+# transaction ends; past 64 per backend (PGPROC_MAX_CACHED_SUBXIDS) every
+# snapshot on the server suboverflows and has to look up pg_subtrans.
+MAX_SUBTRANSACTIONS = 60
+
+
+def is_row_error(error):
+    """ Whether a psycopg2 error was caused by the rows rather than the server """
+    return error.pgcode is not None and error.pgcode[:2] in ROW_ERROR_CLASSES
+
+
+def insert_isolated(cur, sql, rows, report, offset=0, template=None, fetch=False, commit=None):
+    """ Insert rows as one statement, bisecting under savepoints on failure
+
+    A failing slice is rolled back to its savepoint and split in half until
+    the offending rows are isolated, so n rows with k bad ones cost about
+    k * log2(n) extra statements instead of n. sql is an execute_values
+    statement ("INSERT ... VALUES %s"); with fetch it must return exactly
+    one row per input row, in input order. Errors that are not data or
+    constraint errors are raised after rolling back to the savepoint.
+
+    Every savepoint is released, even after a rollback, so only one is open
+    at a time. commit, if given, is called after MAX_SUBTRANSACTIONS
+    successful slices to keep the transaction's subtransactions bounded;
+    without it the caller's transaction is never committed here.
+    """
+    pending = [(0, len(rows))]
+    released = 0
+
+    while pending:
+        low, high = pending.pop()
+        cur.execute("SAVEPOINT batch_insert")
+        report.statements += 1
+        try:
+            result = execute_values(cur, sql, rows[low:high], template=template,
+                                    page_size=high - low, fetch=fetch)
+            cur.execute("RELEASE SAVEPOINT batch_insert")
+        except psycopg2.Error as error:
+            if cur.connection.closed:
+                raise
+            cur.execute("ROLLBACK TO SAVEPOINT batch_insert")
+            cur.execute("RELEASE SAVEPOINT batch_insert")
+            if not is_row_error(error):
+                # deadlocks, timeouts, cancels: retrying smaller slices would
+                # only report every row as rejected
+                raise
+            if high - low == 1:
+                report.rejected.append((offset + low, rows[low], error.pgcode, str(error)))
+            else:
+                middle = (low + high) // 2
+                # the lower half is popped first so rows keep their order
+                pending.append((middle, high))
+                pending.append((low, middle))
+            continue
+
+        report.inserted += high - low
+        if fetch:
+            for i, returned in enumerate(result):
+                report.returned[offset + low + i] = returned
+
+        released += 1
+        if commit is not None and released >= MAX_SUBTRANSACTIONS and pending:
+            commit()
+            released = 0
+
+
+def batch_insert(conn, sql, rows, chunk_size=1000, template=None, fetch=False, report=None):
+    """ Insert rows in chunks, committing each chunk's good rows
+
+    Returns a BatchReport with the inserted count, RETURNING rows and the
+    rejected rows. A chunk with many bad rows is also committed part way,
+    every MAX_SUBTRANSACTIONS slices. Errors other than a refused row (a lost
+    connection, a deadlock, a timeout, ...) are raised; rows committed before
+    stay committed.
+    """
+    report = report or BatchReport()
+    rows = list(rows)
+
+    with conn.cursor() as cur:
+        for start in range(0, len(rows), chunk_size):
+            insert_isolated(cur, sql, rows[start:start + chunk_size], report, start, template, fetch,
+                            commit=conn.commit)
+            conn.commit()
+
+    return report
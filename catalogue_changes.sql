@@ -0,0 +1,81 @@
+-- change log for vendors, parts and vendor_parts, read by 17catalogue_mirror.py.
+-- xid lets readers pick up the changes of transactions that were still
+-- running at their last read once those commit.
+CREATE TABLE IF NOT EXISTS catalogue_changes (
+    change_id BIGSERIAL PRIMARY KEY,
+    xid XID8 NOT NULL DEFAULT pg_current_xact_id(),
+    table_name VARCHAR(20) NOT NULL,
+    op CHAR(1) NOT NULL,
+    row_data JSONB NOT NULL,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS catalogue_changes_xid_idx
+    ON catalogue_changes (xid);
+
+-- how far each saved consumer has read; prune_change_log() only deletes
+-- changes every consumer is past
+CREATE TABLE IF NOT EXISTS catalogue_consumers (
+    consumer VARCHAR(255) PRIMARY KEY,
+    last_change_id BIGINT NOT NULL,
+    pending_xids XID8[] NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION log_catalogue_change()
+RETURNS trigger AS $$
+BEGIN
+    -- TG_ARGV[0] is the logical table name; on a partitioned vendor_parts
+    -- TG_TABLE_NAME would be the partition.
+    -- an update is logged as delete of the old row plus insert of the new one,
+    -- so key changes need no special handling in the mirror
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO catalogue_changes(table_name, op, row_data)
+        VALUES (TG_ARGV[0], 'D', to_jsonb(OLD));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO catalogue_changes(table_name, op, row_data)
+        VALUES (TG_ARGV[0], 'I', to_jsonb(NEW));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- one notification per writing statement is enough to wake the mirror
+CREATE OR REPLACE FUNCTION notify_catalogue_change()
+RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('catalogue_changes', TG_TABLE_NAME::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS vendors_change_log ON vendors;
+CREATE TRIGGER vendors_change_log
+    AFTER INSERT OR UPDATE OR DELETE ON vendors
+    FOR EACH ROW EXECUTE FUNCTION log_catalogue_change('vendors');
+
+DROP TRIGGER IF EXISTS parts_change_log ON parts;
+CREATE TRIGGER parts_change_log
+    AFTER INSERT OR UPDATE OR DELETE ON parts
+    FOR EACH ROW EXECUTE FUNCTION log_catalogue_change('parts');
+
+DROP TRIGGER IF EXISTS vendor_parts_change_log ON vendor_parts;
+CREATE TRIGGER vendor_parts_change_log
+    AFTER INSERT OR UPDATE OR DELETE ON vendor_parts
+    FOR EACH ROW EXECUTE FUNCTION log_catalogue_change('vendor_parts');
+
+DROP TRIGGER IF EXISTS vendors_change_notify ON vendors;
+CREATE TRIGGER vendors_change_notify
+    AFTER INSERT OR UPDATE OR DELETE ON vendors
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_catalogue_change();
+
+DROP TRIGGER IF EXISTS parts_change_notify ON parts;
+CREATE TRIGGER parts_change_notify
+    AFTER INSERT OR UPDATE OR DELETE ON parts
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_catalogue_change();
+
+DROP TRIGGER IF EXISTS vendor_parts_change_notify ON vendor_parts;
+CREATE TRIGGER vendor_parts_change_notify
+    AFTER INSERT OR UPDATE OR DELETE ON vendor_parts
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_catalogue_change();
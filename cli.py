@@ -0,0 +1,323 @@
+import argparse
+import importlib
+import sys
+
+
+def load(module_name):
+    """ Import a numbered script only when one of its commands runs
+
+    Keeps heavy dependencies (graphviz, pandas, ...) out of commands that
+    do not need them.
+    """
+    return importlib.import_module(module_name)
+
+
+def cmd_create_tables(args):
+    load('06transaction').create_tables(partitions=args.partitions)
+    print("Tables created successfully")
+
+
+def cmd_create_function(args):
+    load('07callfunction').create_function_from_file()
+
+
+def cmd_create_procedure(args):
+    load('08callprocedure').create_procedure_from_file()
+
+
+def cmd_create_summary(args):
+    load('06transaction').create_summary_from_file()
+
+
+def cmd_insert_vendor(args):
+    transaction = load('06transaction')
+    if len(args.names) == 1:
+        print(transaction.insert_vendor(args.names[0]))
+    else:
+        transaction.insert_many_vendors([(name,) for name in args.names])
+
+
+def cmd_update_vendor(args):
+    load('06transaction').update_vendor(args.vendor_id, args.name)
+
+
+def cmd_list_vendors(args):
+    if args.page_size:
+        load('12pagination').print_vendors_paged(args.page_size)
+    else:
+        load('06transaction').print_vendors()
+
+
+def cmd_parts_and_vendors(args):
+    load('06transaction').get_parts_and_vendors(use_summary=not args.no_summary)
+
+
+def cmd_add_part(args):
+    load('06transaction').add_part(args.part_name, args.vendor_ids, pipeline=args.pipeline)
+
+
+def cmd_get_parts(args):
+    load('07callfunction').get_parts(args.vendor_id)
+
+
+def cmd_call_procedure(args):
+    load('08callprocedure').add_part(args.part_name, args.vendor_name)
+
+
+def cmd_visualize(args):
+    load('09checkdb').visualize_db_structure()
+
+
+def cmd_health(args):
+    load('09checkdb').check_health(as_json=args.json)
+
+
+def cmd_partition_vendor_parts(args):
+    migration = load('15partition_vendor_parts')
+    if args.validate_only:
+        migration.validate_pruning()
+    else:
+        migration.migrate_vendor_parts(args.partitions, args.batch_size)
+
+
+def cmd_merge_feed(args):
+    merge = load('16merge_feed')
+    merge.merge_feed(args.table, merge.read_feed_csv(args.path),
+                     delete_missing_rows=args.delete_missing, chunk_size=args.chunk_size,
+                     rejected_file=args.rejected_file)
+
+
+def cmd_catalogue_mirror(args):
+    mirror_module = load('17catalogue_mirror')
+    if args.create:
+        mirror_module.create_change_log_from_file()
+    mirror = mirror_module.CatalogueMirror(folder=args.folder)
+    try:
+        mirror.run(poll_seconds=args.poll_seconds)
+    except KeyboardInterrupt:
+        print(f"Applied {mirror.applied} changes")
+
+
+def cmd_suppliers(args):
+    analytics = load('18supplier_analytics')
+    graph = analytics.SupplierGraph.from_database()
+    if args.single_source:
+        print(graph.single_source_parts().to_string(index=False))
+    for vendor_id in args.vendor:
+        analytics.print_vendor_overlap(graph, vendor_id, args.limit)
+    for part_id in args.part:
+        analytics.print_alternative_suppliers(graph, part_id, args.limit)
+
+
+def cmd_adjacency(args):
+    adjacency = load('19adjacency')
+    if args.rebuild:
+        index = adjacency.AdjacencyIndex.from_database()
+        index.save(args.folder)
+    else:
+        index = adjacency.open_index(args.folder)
+    for vendor_id in args.vendor:
+        print(f"Vendor {vendor_id} ({index.vendor_name(vendor_id)}): parts {index.parts_of(vendor_id).tolist()}")
+    for part_id in args.part:
+        print(f"Part {part_id} ({index.part_name(part_id)}): vendors {index.vendors_of(part_id).tolist()}")
+
+
+def cmd_load_test(args):
+    load_test = load('20load_test')
+    if args.sweep:
+        levels = [int(level) for level in args.sweep.split(',')]
+        load_test.find_saturation(levels, args.mix, args.duration, args.processes)
+    else:
+        records = load_test.run_load(args.workers, args.mix, args.rate, args.duration, args.processes)
+        load_test.print_report(records, args.duration, args.interval)
+
+
+def cmd_import_drawings(args):
+    load('21drawing_files').import_drawings(args.folder, args.connections, args.workers, args.chunk_size,
+                                            codec=args.codec)
+
+
+def cmd_export_drawings(args):
+    load('21drawing_files').export_drawings(args.folder, args.connections, args.workers, args.chunk_size)
+
+
+def cmd_load_csv(args):
+    load('11csv_loader').load_csv_folder(args.folder, processes=args.processes)
+
+
+def cmd_queue_workers(args):
+    load('10work_queue').run_workers(args.processes, args.batch_size)
+
+
+def cmd_queue_status(args):
+    load('10work_queue').print_queue_status()
+
+
+def cmd_search(args):
+    search = load('13search')
+    find = search.search_vendors if args.table == 'vendors' else search.search_parts
+    for match in find(args.text, args.limit):
+        print(match)
+
+
+def cmd_slow_queries(args):
+    load('plan_capture').report(args.log_file, args.limit)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Parts database tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sub = commands.add_parser('create-tables', help='create the vendors/parts tables')
+    sub.add_argument('--partitions', type=int, default=0,
+                     help='hash-partition vendor_parts by vendor_id into this many partitions')
+    sub.set_defaults(func=cmd_create_tables)
+
+    sub = commands.add_parser('create-function', help='create get_parts_by_vendor()')
+    sub.set_defaults(func=cmd_create_function)
+
+    sub = commands.add_parser('create-procedure', help='create the add_new_part procedure')
+    sub.set_defaults(func=cmd_create_procedure)
+
+    sub = commands.add_parser('create-summary', help='create the trigger-maintained part_vendor_summary table')
+    sub.set_defaults(func=cmd_create_summary)
+
+    sub = commands.add_parser('insert-vendor', help='insert one or more vendors')
+    sub.add_argument('names', nargs='+')
+    sub.set_defaults(func=cmd_insert_vendor)
+
+    sub = commands.add_parser('update-vendor', help='rename a vendor')
+    sub.add_argument('vendor_id', type=int)
+    sub.add_argument('name')
+    sub.set_defaults(func=cmd_update_vendor)
+
+    sub = commands.add_parser('list-vendors', help='print all vendors')
+    sub.add_argument('--page-size', type=int, default=0,
+                     help='fetch with keyset pagination in pages of this size')
+    sub.set_defaults(func=cmd_list_vendors)
+
+    sub = commands.add_parser('parts-and-vendors', help='print every part with its vendors')
+    sub.add_argument('--no-summary', action='store_true',
+                     help='aggregate from the base tables instead of part_vendor_summary')
+    sub.set_defaults(func=cmd_parts_and_vendors)
+
+    sub = commands.add_parser('add-part', help='add a part supplied by vendor ids')
+    sub.add_argument('part_name')
+    sub.add_argument('vendor_ids', type=int, nargs='*')
+    sub.add_argument('--pipeline', action='store_true', help='send all statements in one round trip')
+    sub.set_defaults(func=cmd_add_part)
+
+    sub = commands.add_parser('get-parts', help='call get_parts_by_vendor()')
+    sub.add_argument('vendor_id', type=int)
+    sub.set_defaults(func=cmd_get_parts)
+
+    sub = commands.add_parser('call-procedure', help='call add_new_part(part, vendor)')
+    sub.add_argument('part_name')
+    sub.add_argument('vendor_name')
+    sub.set_defaults(func=cmd_call_procedure)
+
+    sub = commands.add_parser('visualize', help='draw the schema to database_structure.png')
+    sub.set_defaults(func=cmd_visualize)
+
+    sub = commands.add_parser('health', help='report table sizes, bloat, index usage and activity')
+    sub.add_argument('--json', action='store_true')
+    sub.set_defaults(func=cmd_health)
+
+    sub = commands.add_parser('partition-vendor-parts', help='move vendor_parts to hash partitions online')
+    sub.add_argument('--partitions', type=int, default=8)
+    sub.add_argument('--batch-size', type=int, default=10000)
+    sub.add_argument('--validate-only', action='store_true',
+                     help='only check that vendor lookups prune to one partition')
+    sub.set_defaults(func=cmd_partition_vendor_parts)
+
+    sub = commands.add_parser('catalogue-mirror', help='keep an in-memory catalogue in sync until Ctrl-C')
+    sub.add_argument('--folder', help='save the mirror and its change log position here to resume later')
+    sub.add_argument('--poll-seconds', type=float, default=5.0)
+    sub.add_argument('--create', action='store_true', help='install the change log triggers first')
+    sub.set_defaults(func=cmd_catalogue_mirror)
+
+    sub = commands.add_parser('suppliers', help='co-supplier analytics over vendor_parts')
+    sub.add_argument('--vendor', type=int, action='append', default=[],
+                     help='print the vendors overlapping most with this vendor')
+    sub.add_argument('--part', type=int, action='append', default=[],
+                     help='print alternative suppliers for this part')
+    sub.add_argument('--single-source', action='store_true', help='list parts with only one vendor')
+    sub.add_argument('--limit', type=int, default=10)
+    sub.set_defaults(func=cmd_suppliers)
+
+    sub = commands.add_parser('adjacency', help='look up parts/vendors in the saved CSR index')
+    sub.add_argument('--folder', default='adjacency/')
+    sub.add_argument('--rebuild', action='store_true', help='take a new snapshot instead of catching up')
+    sub.add_argument('--vendor', type=int, action='append', default=[])
+    sub.add_argument('--part', type=int, action='append', default=[])
+    sub.set_defaults(func=cmd_adjacency)
+
+    sub = commands.add_parser('load-test', help='drive a mixed workload and report latency percentiles')
+    sub.add_argument('--workers', type=int, default=8)
+    sub.add_argument('--mix', default='get_vendors=30,get_parts=40,update_vendor=10,add_part=10,add_new_part=10',
+                     help='operation weights, e.g. get_parts=80,update_vendor=20')
+    sub.add_argument('--rate', type=float, help='target operations per second over all workers')
+    sub.add_argument('--duration', type=float, default=30)
+    sub.add_argument('--interval', type=int, default=5, help='timeline window in seconds')
+    sub.add_argument('--processes', action='store_true', help='use processes instead of threads')
+    sub.add_argument('--sweep', help='comma separated worker counts to find the saturation point')
+    sub.set_defaults(func=cmd_load_test)
+
+    sub = commands.add_parser('import-drawings', help='load drawing files named by part id into part_drawings')
+    sub.add_argument('folder')
+    sub.add_argument('--connections', type=int, default=4)
+    sub.add_argument('--workers', type=int, default=16, help='file reader threads')
+    sub.add_argument('--chunk-size', type=int, default=200)
+    sub.add_argument('--codec', choices=['raw', 'zlib', 'zstd'], help='compress new blobs (default: store uncompressed)')
+    sub.set_defaults(func=cmd_import_drawings)
+
+    sub = commands.add_parser('export-drawings', help='write part drawings out as <part_id>.<ext> files')
+    sub.add_argument('folder')
+    sub.add_argument('--connections', type=int, default=4)
+    sub.add_argument('--workers', type=int, default=16, help='file writer threads')
+    sub.add_argument('--chunk-size', type=int, default=200)
+    sub.set_defaults(func=cmd_export_drawings)
+
+    sub = commands.add_parser('load-csv', help='COPY the data/ CSV export in parallel')
+    sub.add_argument('folder', nargs='?', default='data/')
+    sub.add_argument('--processes', type=int)
+    sub.set_defaults(func=cmd_load_csv)
+
+    sub = commands.add_parser('merge-feed', help='upsert a vendor or part feed CSV in bulk')
+    sub.add_argument('table', choices=['vendors', 'parts'])
+    sub.add_argument('path')
+    sub.add_argument('--delete-missing', action='store_true', help='delete rows missing from the feed')
+    sub.add_argument('--chunk-size', type=int, default=100000)
+    sub.add_argument('--rejected-file', help='write rows rejected for a taken name to this CSV file')
+    sub.set_defaults(func=cmd_merge_feed)
+
+    sub = commands.add_parser('queue-workers', help='drain the import job queue')
+    sub.add_argument('--processes', type=int)
+    sub.add_argument('--batch-size', type=int, default=100)
+    sub.set_defaults(func=cmd_queue_workers)
+
+    sub = commands.add_parser('queue-status', help='print import queue depth and throughput')
+    sub.set_defaults(func=cmd_queue_status)
+
+    sub = commands.add_parser('search', help='fuzzy search vendor or part names')
+    sub.add_argument('table', choices=['vendors', 'parts'])
+    sub.add_argument('text')
+    sub.add_argument('--limit', type=int, default=10)
+    sub.set_defaults(func=cmd_search)
+
+    sub = commands.add_parser('slow-queries', help='report captured slow statement plans')
+    sub.add_argument('--log-file')
+    sub.add_argument('--limit', type=int, default=20)
+    sub.set_defaults(func=cmd_slow_queries)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -15,6 +15,28 @@ def load_config(filename='database.ini', section='postgresql'):
 
     return config
 
+def load_replica_configs(filename='database.ini', prefix='replica'):
+    """ Load every read replica section ([replica1], [replica2], ...) """
+    parser = ConfigParser()
+    parser.read(filename)
+
+    return [dict(parser.items(section))
+            for section in parser.sections()
+            if section.startswith(prefix)]
+
+def load_options(filename='database.ini', section='routing'):
+    """ Load an optional section such as [routing] or [plan_capture] """
+    parser = ConfigParser()
+    parser.read(filename)
+
+    if not parser.has_section(section):
+        return {}
+    return dict(parser.items(section))
+
+def load_routing_options(filename='database.ini'):
+    """ Load the optional [routing] section (policy, read_your_writes) """
+    return load_options(filename, 'routing')
+
 if __name__ == '__main__':
     config = load_config()
     print(config)
\ No newline at end of file
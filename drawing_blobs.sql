@@ -0,0 +1,38 @@
+-- content-addressed storage for drawings: identical files are stored once
+-- in drawing_blobs and part_drawings only references them by SHA-256
+CREATE TABLE IF NOT EXISTS drawing_blobs (
+    blob_hash BYTEA PRIMARY KEY,
+    -- size of the original drawing; drawing_data may be compressed (drawing_codec.py)
+    size INTEGER NOT NULL,
+    drawing_data BYTEA NOT NULL
+);
+
+ALTER TABLE part_drawings ADD COLUMN IF NOT EXISTS blob_hash BYTEA
+    REFERENCES drawing_blobs (blob_hash);
+
+CREATE INDEX IF NOT EXISTS part_drawings_blob_hash_idx
+    ON part_drawings (blob_hash);
+
+-- move drawings stored in the old layout into drawing_blobs
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_name = 'part_drawings'
+                 AND column_name = 'drawing_data') THEN
+
+        INSERT INTO drawing_blobs(blob_hash, size, drawing_data)
+        SELECT sha256(drawing_data), length(drawing_data), drawing_data
+        FROM part_drawings
+        WHERE blob_hash IS NULL
+        ON CONFLICT (blob_hash) DO NOTHING;
+
+        UPDATE part_drawings
+        SET blob_hash = sha256(drawing_data)
+        WHERE blob_hash IS NULL;
+
+        ALTER TABLE part_drawings DROP COLUMN drawing_data;
+    END IF;
+END;
+$$;
+
+ALTER TABLE part_drawings ALTER COLUMN blob_hash SET NOT NULL;
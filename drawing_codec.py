@@ -0,0 +1,81 @@
+import ast
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Encoded drawings start with MAGIC and a codec id byte. Anything without the
+# marker is a raw drawing written before compression existed.
+MAGIC = b'\x89PDZ'
+CODEC_IDS = {'raw': 0, 'zlib': 1, 'zstd': 2}
+CODEC_NAMES = {codec_id: name for name, codec_id in CODEC_IDS.items()}
+
+
+def default_codec():
+    """ zstd when the zstandard package is installed, zlib otherwise """
+    return 'zstd' if zstandard is not None else 'zlib'
+
+
+def encode(data, codec=None, level=None):
+    """ Compress drawing bytes and prefix them with the format marker
+
+    codec is 'zstd', 'zlib' or 'raw'; None also stores the data raw, so
+    callers that want compression pass a codec, e.g. default_codec().
+    Data that does not get smaller is stored raw.
+    """
+    if codec is None or codec == 'raw':
+        return mark_raw(data)
+
+    if codec == 'zstd':
+        if zstandard is None:
+            raise Exception('zstd codec needs the zstandard package')
+        compressed = zstandard.ZstdCompressor(level=level or 3).compress(data)
+    elif codec == 'zlib':
+        compressed = zlib.compress(data, level or 6)
+    else:
+        raise ValueError(f"Unknown codec: {codec}")
+
+    encoded = MAGIC + bytes([CODEC_IDS[codec]]) + compressed
+    if len(encoded) >= len(data):
+        return mark_raw(data)
+    return encoded
+
+
+def mark_raw(data):
+    """ Store data uncompressed, marking it only if it could be mistaken for encoded data """
+    data = bytes(data)
+    if data.startswith(MAGIC):
+        return MAGIC + bytes([CODEC_IDS['raw']]) + data
+    return data
+
+
+def decode(data):
+    """ Return the original drawing bytes for encoded or raw data """
+    data = bytes(data)
+    if not data.startswith(MAGIC) or len(data) <= len(MAGIC):
+        return data
+
+    codec = CODEC_NAMES.get(data[len(MAGIC)])
+    payload = data[len(MAGIC) + 1:]
+    if codec == 'raw':
+        return payload
+    if codec == 'zlib':
+        return zlib.decompress(payload)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise Exception('zstd encoded drawing needs the zstandard package')
+        return zstandard.ZstdDecompressor().decompress(payload)
+    # unknown id: the marker was part of a raw drawing
+    return data
+
+
+def parse_bytes_repr(value):
+    """ bytes that DataFrame.to_csv wrote as their repr (b'...') back as bytes
+
+    Anything else, including plain text, is returned unchanged.
+    """
+    if isinstance(value, str) and value[:2] in ("b'", 'b"'):
+        return ast.literal_eval(value)
+    return value
@@ -0,0 +1,15 @@
+CREATE TABLE IF NOT EXISTS import_jobs (
+    job_id BIGSERIAL PRIMARY KEY,
+    job_type VARCHAR(20) NOT NULL,
+    payload JSONB NOT NULL,
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',
+    worker VARCHAR(64),
+    error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at TIMESTAMPTZ
+);
+
+-- workers only ever look for pending jobs, so keep that index small
+CREATE INDEX IF NOT EXISTS import_jobs_pending_idx
+    ON import_jobs (job_id)
+    WHERE status = 'pending';
@@ -0,0 +1,128 @@
+-- one row per part with its vendor names, kept current by triggers so
+-- get_parts_and_vendors does not re-aggregate the whole catalogue
+CREATE TABLE IF NOT EXISTS part_vendor_summary (
+    part_id INTEGER PRIMARY KEY,
+    part_name VARCHAR(255) NOT NULL,
+    vendors VARCHAR(255)[] NOT NULL DEFAULT '{}'
+);
+
+CREATE OR REPLACE FUNCTION refresh_part_vendor_summary(p_part_ids INTEGER[])
+RETURNS void AS $$
+BEGIN
+    IF p_part_ids IS NULL THEN
+        RETURN;
+    END IF;
+
+    -- Serialize refreshes of the same part. Without the lock two
+    -- transactions linking vendors to one part each aggregate a snapshot
+    -- without the other's link and the later write loses a vendor. The
+    -- statements below run after the lock is granted, so under READ
+    -- COMMITTED they see the other transaction's committed links. Sorted
+    -- ids keep concurrent refreshes of several parts from deadlocking.
+    PERFORM pg_advisory_xact_lock('part_vendor_summary'::regclass::oid::int, part_id)
+    FROM (SELECT DISTINCT unnest(p_part_ids) AS part_id ORDER BY 1) ids;
+
+    -- parts that no longer exist
+    DELETE FROM part_vendor_summary s
+    WHERE s.part_id = ANY(p_part_ids)
+      AND NOT EXISTS (SELECT 1 FROM parts p WHERE p.part_id = s.part_id);
+
+    INSERT INTO part_vendor_summary(part_id, part_name, vendors)
+    SELECT p.part_id,
+           p.part_name,
+           COALESCE(array_agg(v.vendor_name ORDER BY v.vendor_id)
+                    FILTER (WHERE v.vendor_id IS NOT NULL), '{}')
+    FROM parts p
+        LEFT JOIN vendor_parts vp ON p.part_id = vp.part_id
+        LEFT JOIN vendors v ON vp.vendor_id = v.vendor_id
+    WHERE p.part_id = ANY(p_part_ids)
+    GROUP BY p.part_id, p.part_name
+    ON CONFLICT (part_id) DO UPDATE
+        SET part_name = EXCLUDED.part_name,
+            vendors = EXCLUDED.vendors;
+END;
+$$ LANGUAGE plpgsql;
+
+-- statement-level trigger for parts and vendor_parts: both tables carry part_id
+CREATE OR REPLACE FUNCTION part_vendor_summary_part_trigger()
+RETURNS trigger AS $$
+DECLARE
+    v_part_ids INTEGER[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT part_id) INTO v_part_ids FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT part_id) INTO v_part_ids FROM old_rows;
+    ELSE
+        SELECT array_agg(DISTINCT part_id) INTO v_part_ids
+        FROM (SELECT part_id FROM new_rows
+              UNION
+              SELECT part_id FROM old_rows) changed;
+    END IF;
+
+    PERFORM refresh_part_vendor_summary(v_part_ids);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- a renamed vendor changes the vendor list of every part it supplies
+CREATE OR REPLACE FUNCTION part_vendor_summary_vendor_trigger()
+RETURNS trigger AS $$
+DECLARE
+    v_part_ids INTEGER[];
+BEGIN
+    SELECT array_agg(DISTINCT vp.part_id) INTO v_part_ids
+    FROM vendor_parts vp
+        JOIN new_rows n ON n.vendor_id = vp.vendor_id;
+
+    PERFORM refresh_part_vendor_summary(v_part_ids);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS part_vendor_summary_ins ON parts;
+CREATE TRIGGER part_vendor_summary_ins AFTER INSERT ON parts
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION part_vendor_summary_part_trigger();
+
+DROP TRIGGER IF EXISTS part_vendor_summary_upd ON parts;
+CREATE TRIGGER part_vendor_summary_upd AFTER UPDATE ON parts
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION part_vendor_summary_part_trigger();
+
+DROP TRIGGER IF EXISTS part_vendor_summary_del ON parts;
+CREATE TRIGGER part_vendor_summary_del AFTER DELETE ON parts
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION part_vendor_summary_part_trigger();
+
+DROP TRIGGER IF EXISTS part_vendor_summary_ins ON vendor_parts;
+CREATE TRIGGER part_vendor_summary_ins AFTER INSERT ON vendor_parts
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION part_vendor_summary_part_trigger();
+
+DROP TRIGGER IF EXISTS part_vendor_summary_upd ON vendor_parts;
+CREATE TRIGGER part_vendor_summary_upd AFTER UPDATE ON vendor_parts
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION part_vendor_summary_part_trigger();
+
+DROP TRIGGER IF EXISTS part_vendor_summary_del ON vendor_parts;
+CREATE TRIGGER part_vendor_summary_del AFTER DELETE ON vendor_parts
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION part_vendor_summary_part_trigger();
+
+DROP TRIGGER IF EXISTS part_vendor_summary_upd ON vendors;
+CREATE TRIGGER part_vendor_summary_upd AFTER UPDATE ON vendors
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION part_vendor_summary_vendor_trigger();
+
+-- backfill from the current catalogue
+TRUNCATE part_vendor_summary;
+INSERT INTO part_vendor_summary(part_id, part_name, vendors)
+SELECT p.part_id,
+       p.part_name,
+       COALESCE(array_agg(v.vendor_name ORDER BY v.vendor_id)
+                FILTER (WHERE v.vendor_id IS NOT NULL), '{}')
+FROM parts p
+    LEFT JOIN vendor_parts vp ON p.part_id = vp.part_id
+    LEFT JOIN vendors v ON vp.vendor_id = v.vendor_id
+GROUP BY p.part_id, p.part_name;
@@ -0,0 +1,56 @@
+class Pipeline:
+    """ Queue statements on a cursor and send them to the server in one round trip
+
+    psycopg2 has no libpq pipeline mode, so the queued statements are rendered
+    with mogrify() and sent together as a single multi-statement query.
+    Only the result of the last statement is available after sync().
+    """
+
+    def __init__(self, cur):
+        self.cur = cur
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        """ Queue a statement without waiting for the server """
+        self.statements.append(self.cur.mogrify(sql, params))
+
+    def sync(self):
+        """ Send all queued statements and return the rows of the last one """
+        if not self.statements:
+            return None
+
+        batch = b';\n'.join(self.statements)
+        self.statements = []
+        self.cur.execute(batch)
+
+        if self.cur.description is None:
+            return None
+        return self.cur.fetchall()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.sync()
+        else:
+            self.statements = []
+        return False
+
+
+# SQL for inserting a part and linking it to vendors in the same batch.
+# currval() returns the part_id generated by the INSERT earlier in the batch,
+# so the links do not need to wait for the part_id to come back.
+PIPELINE_PART_SQL = "INSERT INTO parts(part_name) VALUES(%s)"
+PIPELINE_VENDOR_PART_SQL = """
+    INSERT INTO vendor_parts(vendor_id, part_id)
+    SELECT unnest(%s::int[]), currval(pg_get_serial_sequence('parts', 'part_id'))
+"""
+PIPELINE_PART_ID_SQL = "SELECT currval(pg_get_serial_sequence('parts', 'part_id'))"
+
+
+def queue_add_part(pipeline, part_name, vendors_id):
+    """ Queue the statements that add a part and assign vendors to it """
+    pipeline.execute(PIPELINE_PART_SQL, (part_name,))
+    if vendors_id:
+        pipeline.execute(PIPELINE_VENDOR_PART_SQL, (list(vendors_id),))
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import traceback
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2 import sql
+
+# Statements slower than threshold_ms get their plan stored in log_file.
+# Set from the [plan_capture] section of database.ini by the router.
+settings = {
+    'threshold_ms': 200.0,
+    'log_file': 'slow_queries.db',
+}
+
+LOG_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS slow_queries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        captured_at REAL NOT NULL,
+        fingerprint TEXT NOT NULL,
+        query TEXT NOT NULL,
+        params TEXT,
+        duration_ms REAL NOT NULL,
+        call_site TEXT,
+        plan TEXT,
+        plan_hash TEXT
+    )
+"""
+
+# only these can be planned with EXPLAIN
+EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|VALUES)\b', re.IGNORECASE)
+# literals, quoted identifiers and comments, whose semicolons do not end a statement
+NOT_CODE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\$(\w*)\$.*?\$\1\$|--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def configure(threshold_ms=None, log_file=None):
+    """ Change the slow statement threshold or the SQLite log file """
+    if threshold_ms is not None:
+        settings['threshold_ms'] = float(threshold_ms)
+    if log_file is not None:
+        settings['log_file'] = log_file
+
+
+def fingerprint(query):
+    """ Identify a statement independent of its parameters and whitespace """
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    normalized = ' '.join(str(query).split()).lower()
+    normalized = re.sub(r"'(?:[^']|'')*'", '?', normalized)
+    normalized = re.sub(r'\b\d+\b', '?', normalized)
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def call_site():
+    """ First stack frame outside this module and psycopg2 """
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        filename = os.path.basename(frame.filename)
+        if filename != 'plan_capture.py' and 'psycopg2' not in frame.filename:
+            return f"{filename}:{frame.lineno} {frame.name}"
+    return None
+
+
+def is_single_statement(text):
+    """ Whether text holds one statement (a trailing semicolon is allowed)
+
+    EXPLAIN only covers the first statement of a batch and the rest would
+    run again for real, so batches such as Pipeline.sync() sends are never
+    explained.
+    """
+    code = NOT_CODE.sub(' ', text).strip().rstrip(';')
+    return ';' not in code
+
+
+def explain(conn, query, params):
+    """ Plan the statement without running it again; None if it cannot be planned """
+    if conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+        return None
+    if isinstance(query, bytes):
+        text = query.decode('utf-8', 'replace')
+    else:
+        text = str(query)
+    if not EXPLAINABLE.match(text) or not is_single_statement(text):
+        return None
+
+    # a plain cursor, so planning is not captured again
+    cur = psycopg2.extensions.cursor(conn)
+    try:
+        if conn.autocommit:
+            cur.execute('EXPLAIN (FORMAT JSON) ' + text, params)
+            return cur.fetchone()[0]
+
+        # keep a failed EXPLAIN from aborting the caller's transaction
+        cur.execute('SAVEPOINT plan_capture')
+        try:
+            cur.execute('EXPLAIN (FORMAT JSON) ' + text, params)
+            plan = cur.fetchone()[0]
+            cur.execute('RELEASE SAVEPOINT plan_capture')
+            return plan
+        except psycopg2.Error:
+            cur.execute('ROLLBACK TO SAVEPOINT plan_capture')
+            return None
+    except psycopg2.Error:
+        return None
+    finally:
+        cur.close()
+
+
+def record(query, params, duration_ms, site, plan):
+    """ Store one slow statement in the SQLite log """
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    plan_text = json.dumps(plan) if plan is not None else None
+    plan_hash = hashlib.sha1(plan_text.encode('utf-8')).hexdigest()[:16] if plan_text else None
+
+    with sqlite3.connect(settings['log_file']) as log:
+        log.execute(LOG_SCHEMA)
+        log.execute("""
+            INSERT INTO slow_queries(captured_at, fingerprint, query, params,
+                                     duration_ms, call_site, plan, plan_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (time.time(), fingerprint(query), str(query),
+              repr(params) if params is not None else None,
+              duration_ms, site, plan_text, plan_hash))
+    log.close()
+
+
+class PlanCaptureMixin:
+    """ Cursor mixin timing execute()/callproc() and logging plans of slow ones """
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        result = super().execute(query, vars)
+        self._check_slow(query, vars, start)
+        return result
+
+    def callproc(self, procname, parameters=None):
+        start = time.perf_counter()
+        result = super().callproc(procname, parameters)
+        placeholders = ', '.join(['%s'] * len(parameters or ()))
+        self._check_slow(f"SELECT * FROM {procname}({placeholders})", parameters, start)
+        return result
+
+    def _check_slow(self, query, params, start):
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms < settings['threshold_ms']:
+            return
+        if isinstance(query, sql.Composable):
+            query = query.as_string(self.connection)
+        try:
+            plan = explain(self.connection, query, params)
+            record(query, params, duration_ms, call_site(), plan)
+        except (Exception, sqlite3.Error) as error:
+            print(f"Error capturing slow query plan: {error}")
+
+
+_cursor_classes = {}
+
+
+def capture_cursor(cursor_class):
+    """ Subclass of cursor_class with plan capture mixed in """
+    if cursor_class not in _cursor_classes:
+        _cursor_classes[cursor_class] = type(f"PlanCapture{cursor_class.__name__}",
+                                             (PlanCaptureMixin, cursor_class), {})
+    return _cursor_classes[cursor_class]
+
+
+class PlanCaptureConnection(psycopg2.extensions.connection):
+    """ Connection whose cursors, whatever their cursor_factory, capture slow plans
+
+        psycopg2.connect(**config, connection_factory=PlanCaptureConnection)
+    """
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = capture_cursor(factory)
+        return super().cursor(*args, **kwargs)
+
+
+def report(log_file=None, limit=20):
+    """ Print slow statements grouped by fingerprint, slowest total time first """
+    report_sql = """
+        SELECT fingerprint,
+               count(*),
+               avg(duration_ms),
+               max(duration_ms),
+               count(DISTINCT plan_hash),
+               group_concat(DISTINCT call_site),
+               (SELECT query FROM slow_queries s2
+                WHERE s2.fingerprint = s.fingerprint
+                ORDER BY captured_at DESC LIMIT 1)
+        FROM slow_queries s
+        GROUP BY fingerprint
+        ORDER BY sum(duration_ms) DESC
+        LIMIT ?
+    """
+    log_file = log_file or settings['log_file']
+    if not os.path.exists(log_file):
+        print(f"No slow query log found: {log_file}")
+        return []
+
+    with sqlite3.connect(log_file) as log:
+        rows = log.execute(report_sql, (limit,)).fetchall()
+    log.close()
+
+    print("\nSlow statements:")
+    print("-" * 90)
+    print(f"{'Fingerprint':<18} {'Calls':>6} {'Avg ms':>10} {'Max ms':>10} {'Plans':>6}  Call sites")
+    print("-" * 90)
+    for fp, calls, avg_ms, max_ms, plans, sites, query in rows:
+        print(f"{fp:<18} {calls:>6} {avg_ms:>10.1f} {max_ms:>10.1f} {plans:>6}  {sites or ''}")
+        print(f"    {' '.join(query.split())[:84]}")
+    print("-" * 90)
+
+    return rows
+
+
+def plans_for(fingerprint_value, log_file=None):
+    """ Return (captured_at, duration_ms, plan) for one fingerprint, newest first """
+    log_file = log_file or settings['log_file']
+    with sqlite3.connect(log_file) as log:
+        rows = log.execute("""
+            SELECT captured_at, duration_ms, plan
+            FROM slow_queries
+            WHERE fingerprint = ?
+            ORDER BY captured_at DESC
+        """, (fingerprint_value,)).fetchall()
+    log.close()
+    return [(captured_at, duration_ms, json.loads(plan) if plan else None)
+            for captured_at, duration_ms, plan in rows]
+
+
+if __name__ == '__main__':
+    report()
@@ -0,0 +1,123 @@
+import itertools
+import random
+import threading
+
+import psycopg2
+from config import load_config, load_replica_configs, load_routing_options, load_options
+import plan_capture
+
+
+def parse_lsn(lsn):
+    """ Convert a pg_lsn string like '16/B374D848' to an integer """
+    high, low = lsn.split('/')
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+class Router:
+    """ Send writes to the primary and reads to the replicas
+
+    database.ini holds the primary in [postgresql] and any number of replicas
+    in sections whose names start with "replica". An optional [routing]
+    section chooses the policy and read-your-writes:
+
+        [routing]
+        policy = round_robin        ; or random
+        read_your_writes = true
+
+    With read_your_writes, the primary WAL position is remembered after each
+    write and a replica is only used once it has replayed past it; otherwise
+    the read falls back to the primary.
+
+    An optional [plan_capture] section logs the plans of slow statements
+    (see plan_capture.py):
+
+        [plan_capture]
+        threshold_ms = 200
+        log_file = slow_queries.db
+    """
+
+    POLICIES = ('round_robin', 'random')
+
+    def __init__(self, filename='database.ini'):
+        self.primary = load_config(filename)
+        self.replicas = load_replica_configs(filename)
+        options = load_routing_options(filename)
+
+        self.policy = options.get('policy', 'round_robin')
+        if self.policy not in self.POLICIES:
+            raise Exception(f'Unknown routing policy {self.policy} in {filename}')
+        self.read_your_writes = options.get('read_your_writes', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+        self.connection_factory = None
+        capture = load_options(filename, 'plan_capture')
+        if capture:
+            plan_capture.configure(capture.get('threshold_ms'), capture.get('log_file'))
+            self.connection_factory = plan_capture.PlanCaptureConnection
+
+        self.last_write_lsn = None
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def connect_write(self):
+        """ Connect to the primary """
+        return psycopg2.connect(connection_factory=self.connection_factory, **self.primary)
+
+    def note_write(self, conn):
+        """ Remember the primary WAL position after a commit on conn """
+        if not self.read_your_writes:
+            return
+
+        with conn.cursor() as cur:
+            cur.execute('SELECT pg_current_wal_lsn()::text')
+            lsn = parse_lsn(cur.fetchone()[0])
+        conn.commit()
+
+        with self._lock:
+            if self.last_write_lsn is None or lsn > self.last_write_lsn:
+                self.last_write_lsn = lsn
+
+    def replica_order(self):
+        """ Replicas in the order they should be tried for the next read """
+        if self.policy == 'random':
+            return random.sample(self.replicas, len(self.replicas))
+
+        start = next(self._counter) % len(self.replicas)
+        return self.replicas[start:] + self.replicas[:start]
+
+    def caught_up(self, conn, lsn):
+        """ Check whether a replica has replayed the WAL up to lsn """
+        with conn.cursor() as cur:
+            cur.execute('SELECT pg_last_wal_replay_lsn()::text')
+            replay_lsn = cur.fetchone()[0]
+        conn.rollback()
+        return replay_lsn is not None and parse_lsn(replay_lsn) >= lsn
+
+    def connect_read(self):
+        """ Connect to a replica chosen by the policy, or to the primary """
+        if not self.replicas:
+            return self.connect_write()
+
+        lsn = self.last_write_lsn if self.read_your_writes else None
+        for config in self.replica_order():
+            try:
+                conn = psycopg2.connect(connection_factory=self.connection_factory, **config)
+            except psycopg2.OperationalError as error:
+                print(f"Replica {config.get('host')} unavailable: {error}")
+                continue
+
+            if lsn is None or self.caught_up(conn, lsn):
+                return conn
+            conn.close()
+
+        return self.connect_write()
+
+
+_router = None
+
+
+def get_router():
+    """ Return the shared Router built from database.ini """
+    global _router
+    if _router is None:
+        _router = Router()
+    return _router
@@ -0,0 +1,105 @@
+from itertools import starmap
+
+import psycopg2.extensions
+
+
+class Row:
+    """ Base class for compact query result rows
+
+    Subclasses only declare __slots__, so a row costs a few pointers instead
+    of a per-row dict. Fields can be read as attributes, by position or by
+    name (row['vendor_id']) so code written for the old dict rows still works.
+    """
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # a generated __init__ assigning each slot directly is as fast to
+        # build as a dict; a generic setattr loop is about three times slower
+        fields = cls.__slots__
+        body = ''.join(f"    self.{name} = {name}\n" for name in fields) or "    pass\n"
+        namespace = {}
+        exec(f"def __init__(self, {', '.join(fields)}):\n{body}", namespace)
+        cls.__init__ = namespace['__init__']
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return getattr(self, self.__slots__[key])
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Vendor(Row):
+    __slots__ = ('vendor_id', 'vendor_name')
+
+
+class Part(Row):
+    __slots__ = ('part_id', 'part_name')
+
+
+class VendorPart(Row):
+    __slots__ = ('vendor_id', 'part_id')
+
+
+class PartDrawing(Row):
+    __slots__ = ('part_id', 'file_extension', 'drawing_data')
+
+
+class RowCursor(psycopg2.extensions.cursor):
+    """ Cursor that builds row_class objects straight from the fetched tuples """
+    row_class = None
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is None:
+            return None
+        return self.row_class(*row)
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        return list(starmap(self.row_class, rows))
+
+    def fetchall(self):
+        return list(starmap(self.row_class, super().fetchall()))
+
+    def __iter__(self):
+        return starmap(self.row_class, super().__iter__())
+
+
+_cursor_classes = {}
+
+
+def row_cursor(row_class):
+    """ Return a cursor_factory producing row_class rows, or plain tuples for None
+
+        with conn.cursor(cursor_factory=row_cursor(Vendor)) as cur:
+    """
+    if row_class is None:
+        return psycopg2.extensions.cursor
+    if row_class not in _cursor_classes:
+        _cursor_classes[row_class] = type(f"{row_class.__name__}Cursor",
+                                          (RowCursor,), {'row_class': row_class})
+    return _cursor_classes[row_class]
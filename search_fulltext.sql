@@ -0,0 +1,21 @@
+-- optional full-text columns, kept current by triggers
+ALTER TABLE vendors ADD COLUMN IF NOT EXISTS vendor_tsv tsvector;
+ALTER TABLE parts ADD COLUMN IF NOT EXISTS part_tsv tsvector;
+
+UPDATE vendors SET vendor_tsv = to_tsvector('simple', vendor_name);
+UPDATE parts SET part_tsv = to_tsvector('simple', part_name);
+
+DROP TRIGGER IF EXISTS vendors_tsv_update ON vendors;
+CREATE TRIGGER vendors_tsv_update
+    BEFORE INSERT OR UPDATE OF vendor_name ON vendors
+    FOR EACH ROW EXECUTE FUNCTION
+    tsvector_update_trigger(vendor_tsv, 'pg_catalog.simple', vendor_name);
+
+DROP TRIGGER IF EXISTS parts_tsv_update ON parts;
+CREATE TRIGGER parts_tsv_update
+    BEFORE INSERT OR UPDATE OF part_name ON parts
+    FOR EACH ROW EXECUTE FUNCTION
+    tsvector_update_trigger(part_tsv, 'pg_catalog.simple', part_name);
+
+CREATE INDEX IF NOT EXISTS vendors_vendor_tsv_idx ON vendors USING GIN (vendor_tsv);
+CREATE INDEX IF NOT EXISTS parts_part_tsv_idx ON parts USING GIN (part_tsv);
@@ -0,0 +1,16 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- trigram indexes serve both similarity (%) and ILIKE '%...%' lookups
+CREATE INDEX IF NOT EXISTS vendors_vendor_name_trgm_idx
+    ON vendors USING GIN (vendor_name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS parts_part_name_trgm_idx
+    ON parts USING GIN (part_name gin_trgm_ops);
+
+-- searches shorter than three characters have no trigrams; they are
+-- prefix matches on lower(name) served by these indexes instead
+CREATE INDEX IF NOT EXISTS vendors_vendor_name_prefix_idx
+    ON vendors (lower(vendor_name) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS parts_part_name_prefix_idx
+    ON parts (lower(part_name) text_pattern_ops);
@@ -0,0 +1,55 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('psycopg2')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+adjacency = importlib.import_module('19adjacency')
+
+
+def sample_index():
+    links = pd.DataFrame({'vendor_id': [1, 1, 2], 'part_id': [10, 11, 10]}, dtype='int32')
+    vendors = pd.DataFrame({'vendor_id': [1, 2], 'vendor_name': ['Acme', 'Bolt Co']})
+    parts = pd.DataFrame({'part_id': [10, 11], 'part_name': ['Screw', 'Nut']})
+    return adjacency.AdjacencyIndex.build(links, vendors, parts, last_change_id=100)
+
+
+def test_save_after_changes_to_memory_mapped_index(tmp_path):
+    folder = str(tmp_path)
+    sample_index().save(folder)
+
+    index = adjacency.AdjacencyIndex.load(folder)
+    index.apply_changes([('vendor_parts', 'I', {'vendor_id': 2, 'part_id': 11})])
+    index.save(folder)
+
+    reloaded = adjacency.AdjacencyIndex.load(folder)
+    assert list(reloaded.parts_of(1)) == [10, 11]
+    assert list(reloaded.parts_of(2)) == [10, 11]
+    assert list(reloaded.vendors_of(11)) == [1, 2]
+    assert reloaded.vendor_name(1) == 'Acme'
+    assert reloaded.part_name(10) == 'Screw'
+
+
+def test_apply_changes_patches_names_and_links(tmp_path):
+    folder = str(tmp_path)
+    sample_index().save(folder)
+
+    index = adjacency.AdjacencyIndex.load(folder)
+    index.apply_changes([
+        ('vendors', 'I', {'vendor_id': 3, 'vendor_name': 'Cog Ltd'}),
+        ('vendors', 'D', {'vendor_id': 2, 'vendor_name': 'Bolt Co'}),
+        ('vendor_parts', 'D', {'vendor_id': 1, 'part_id': 10}),
+    ])
+    index.save(folder)
+
+    reloaded = adjacency.AdjacencyIndex.load(folder)
+    assert list(reloaded.parts_of(1)) == [11]
+    assert list(reloaded.vendors_of(10)) == [2]
+    assert reloaded.vendor_name(3) == 'Cog Ltd'
+    assert reloaded.vendor_name(2) is None
+    assert reloaded.part_name(11) == 'Nut'
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+
+
+class VendorCache:
+    """ Bounded two-way cache between vendor names and vendor ids
+
+    Names that are not cached are resolved in one round trip with a
+    set-based upsert, so unknown vendors are created exactly once
+    (this relies on the unique index from vendor_upsert.sql).
+    The least recently used entries are evicted once maxsize is reached.
+    """
+
+    UPSERT_SQL = """
+        WITH input(vendor_name) AS (
+            SELECT DISTINCT unnest(%s::varchar[])
+        ),
+        inserted AS (
+            INSERT INTO vendors(vendor_name)
+            SELECT vendor_name FROM input
+            ON CONFLICT (vendor_name) DO NOTHING
+            RETURNING vendor_id, vendor_name
+        )
+        SELECT vendor_id, vendor_name FROM inserted
+        UNION ALL
+        SELECT v.vendor_id, v.vendor_name
+        FROM vendors v
+            JOIN input i ON i.vendor_name = v.vendor_name
+    """
+
+    def __init__(self, conn, maxsize=100000):
+        self.conn = conn
+        self.maxsize = maxsize
+        self.name_to_id = OrderedDict()
+        self.id_to_name = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.name_to_id)
+
+    def put(self, vendor_id, vendor_name):
+        """ Add or refresh a vendor in the cache """
+        old_id = self.name_to_id.pop(vendor_name, None)
+        if old_id is not None:
+            self.id_to_name.pop(old_id, None)
+        old_name = self.id_to_name.pop(vendor_id, None)
+        if old_name is not None:
+            self.name_to_id.pop(old_name, None)
+
+        self.name_to_id[vendor_name] = vendor_id
+        self.id_to_name[vendor_id] = vendor_name
+
+        while len(self.name_to_id) > self.maxsize:
+            _, evicted_id = self.name_to_id.popitem(last=False)
+            self.id_to_name.pop(evicted_id, None)
+
+    def warm(self, limit=None):
+        """ Bulk load vendors into the cache, most recent ids first """
+        limit = limit or self.maxsize
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT vendor_id, vendor_name FROM vendors "
+                        "ORDER BY vendor_id DESC LIMIT %s", (limit,))
+            rows = cur.fetchall()
+
+        for vendor_id, vendor_name in reversed(rows):
+            self.put(vendor_id, vendor_name)
+        return len(rows)
+
+    def get_ids(self, vendor_names):
+        """ Resolve vendor names to ids, creating missing vendors on the server """
+        found = {}
+        missing = []
+        for name in vendor_names:
+            vendor_id = self.name_to_id.get(name)
+            if vendor_id is None:
+                missing.append(name)
+            else:
+                self.name_to_id.move_to_end(name)
+                self.hits += 1
+                found[name] = vendor_id
+
+        if missing:
+            self.misses += len(missing)
+            with self.conn.cursor() as cur:
+                cur.execute(self.UPSERT_SQL, (missing,))
+                rows = cur.fetchall()
+                # A name committed by another importer after the upsert's
+                # snapshot hits the conflict but is invisible to its join;
+                # a second statement takes a new snapshot and sees it.
+                returned = {name for _, name in rows}
+                unresolved = [name for name in set(missing) if name not in returned]
+                if unresolved:
+                    cur.execute("SELECT vendor_id, vendor_name FROM vendors "
+                                "WHERE vendor_name = ANY(%s::varchar[])", (unresolved,))
+                    rows += cur.fetchall()
+            for vendor_id, name in rows:
+                found[name] = vendor_id
+                self.put(vendor_id, name)
+
+        return [found[name] for name in vendor_names]
+
+    def get_id(self, vendor_name):
+        """ Resolve one vendor name to its id """
+        return self.get_ids([vendor_name])[0]
+
+    def get_name(self, vendor_id):
+        """ Look up a vendor name by id, fetching it if it is not cached """
+        if vendor_id in self.id_to_name:
+            name = self.id_to_name[vendor_id]
+            self.name_to_id.move_to_end(name)
+            self.hits += 1
+            return name
+
+        self.misses += 1
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT vendor_name FROM vendors WHERE vendor_id = %s", (vendor_id,))
+            row = cur.fetchone()
+        if row is None:
+            return None
+        self.put(vendor_id, row[0])
+        return row[0]
@@ -0,0 +1,25 @@
+-- vendor names identify vendors on the write paths, so make them unique.
+-- Existing duplicates must be merged before this index can be built.
+CREATE UNIQUE INDEX IF NOT EXISTS vendors_vendor_name_key
+    ON vendors (vendor_name);
+
+CREATE OR REPLACE FUNCTION get_or_create_vendor(p_vendor_name VARCHAR)
+RETURNS INTEGER AS $$
+DECLARE
+    v_vendor_id INT;
+BEGIN
+    INSERT INTO vendors(vendor_name)
+    VALUES(p_vendor_name)
+    ON CONFLICT (vendor_name) DO NOTHING
+    RETURNING vendor_id INTO v_vendor_id;
+
+    -- the vendor already existed
+    IF v_vendor_id IS NULL THEN
+        SELECT vendor_id INTO v_vendor_id
+        FROM vendors
+        WHERE vendor_name = p_vendor_name;
+    END IF;
+
+    RETURN v_vendor_id;
+END;
+$$ LANGUAGE plpgsql;
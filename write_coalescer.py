@@ -0,0 +1,214 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import psycopg2
+from psycopg2.extras import execute_values
+from router import get_router
+
+INSERT_VENDOR_SQL = "INSERT INTO vendors(vendor_id, vendor_name) VALUES %s"
+VENDOR_IDS_SQL = "SELECT nextval(pg_get_serial_sequence('vendors', 'vendor_id')) FROM generate_series(1, %s)"
+UPDATE_VENDOR_SQL = """
+    UPDATE vendors AS v
+    SET vendor_name = d.vendor_name
+    FROM (VALUES %s) AS d(vendor_id, vendor_name)
+    WHERE v.vendor_id = d.vendor_id
+    RETURNING v.vendor_id, v.vendor_name
+"""
+
+_CLOSE = object()
+
+
+class WriteCoalescer:
+    """ Combine concurrent single-row vendor writes into one transaction
+
+    insert_vendor/update_vendor calls from any thread are queued; a writer
+    thread waits up to max_delay seconds for more, runs each kind of write
+    as one multi-row statement and commits once. Every caller gets its own
+    result (or exception) through a Future. If a batch statement fails, its
+    requests are retried one by one under savepoints, so one bad row only
+    fails its own caller.
+    """
+
+    def __init__(self, max_delay=0.005, max_batch=500):
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.writes = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def submit_insert_vendor(self, vendor_name):
+        """ Queue an insert; the Future resolves to the new vendor_id """
+        return self._submit('insert', (vendor_name,))
+
+    def submit_update_vendor(self, vendor_id, vendor_name):
+        """ Queue a rename; the Future resolves like update_vendor() """
+        return self._submit('update', (vendor_id, vendor_name))
+
+    def insert_vendor(self, vendor_name):
+        return self.submit_insert_vendor(vendor_name).result()
+
+    def update_vendor(self, vendor_id, vendor_name):
+        return self.submit_update_vendor(vendor_id, vendor_name).result()
+
+    def _submit(self, kind, params):
+        future = Future()
+        with self._lock:
+            # nothing would ever resolve the future once the writer is gone
+            if self.closed:
+                raise RuntimeError("WriteCoalescer is closed")
+            self.requests.put((kind, params, future))
+        return future
+
+    def close(self):
+        """ Write everything still queued and stop the writer thread """
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.requests.put(_CLOSE)
+        self._thread.join()
+
+    def _collect(self):
+        """ Block for one request, then gather more for up to max_delay """
+        first = self.requests.get()
+        if first is _CLOSE:
+            return None, True
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is _CLOSE:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self):
+        router = get_router()
+        conn = None
+        closing = False
+
+        while not closing:
+            batch, closing = self._collect()
+            if not batch:
+                continue
+
+            try:
+                if conn is None or conn.closed:
+                    conn = router.connect_write()
+                results = self._write(conn, batch)
+                conn.commit()
+            except (Exception, psycopg2.DatabaseError) as error:
+                # the commit itself failed: nothing in the batch was written
+                for _, _, future in batch:
+                    future.set_exception(error)
+                if conn is not None and not conn.closed:
+                    conn.close()
+                conn = None
+                continue
+
+            # the batch is committed: a failure here must not fail the callers,
+            # who would retry and write their rows twice
+            try:
+                router.note_write(conn)
+            except (Exception, psycopg2.DatabaseError) as error:
+                print(f"Could not record the write position: {error}")
+                if not conn.closed:
+                    conn.close()
+                conn = None
+
+            for (_, _, future), result in zip(batch, results):
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self.batches += 1
+            self.writes += len(batch)
+
+        if conn is not None:
+            conn.close()
+
+    def _write(self, conn, batch):
+        """ Run the batch, returning a result or exception per request """
+        results = [None] * len(batch)
+        inserts = [i for i, (kind, _, _) in enumerate(batch) if kind == 'insert']
+        updates = [i for i, (kind, _, _) in enumerate(batch) if kind == 'update']
+
+        with conn.cursor() as cur:
+            for positions, write in ((inserts, self._insert_vendors), (updates, self._update_vendors)):
+                if not positions:
+                    continue
+                params = [batch[i][1] for i in positions]
+                cur.execute("SAVEPOINT coalesced_batch")
+                try:
+                    for i, result in zip(positions, write(cur, params)):
+                        results[i] = result
+                    cur.execute("RELEASE SAVEPOINT coalesced_batch")
+                except psycopg2.Error:
+                    cur.execute("ROLLBACK TO SAVEPOINT coalesced_batch")
+                    for i, param in zip(positions, params):
+                        results[i] = self._write_one(cur, write, param)
+
+        return results
+
+    def _write_one(self, cur, write, param):
+        """ Retry a single request under its own savepoint """
+        cur.execute("SAVEPOINT coalesced_row")
+        try:
+            result = write(cur, [param])[0]
+            cur.execute("RELEASE SAVEPOINT coalesced_row")
+            return result
+        except psycopg2.Error as error:
+            cur.execute("ROLLBACK TO SAVEPOINT coalesced_row")
+            return error
+
+    @staticmethod
+    def _insert_vendors(cur, params):
+        # ids are taken from the sequence first so each caller knows its row
+        cur.execute(VENDOR_IDS_SQL, (len(params),))
+        vendor_ids = [row[0] for row in cur.fetchall()]
+        execute_values(cur, INSERT_VENDOR_SQL,
+                       [(vendor_id, vendor_name) for vendor_id, (vendor_name,) in zip(vendor_ids, params)],
+                       page_size=len(params))
+        return vendor_ids
+
+    @staticmethod
+    def _update_vendors(cur, params):
+        # the last rename of a vendor wins, as if the calls ran one after another
+        latest = {vendor_id: vendor_name for vendor_id, vendor_name in params}
+        rows = execute_values(cur, UPDATE_VENDOR_SQL, list(latest.items()),
+                              template='(%s::int, %s::varchar)', page_size=len(latest), fetch=True)
+        found = {vendor_id for vendor_id, _ in rows}
+        return [{'vendor_id': vendor_id, 'vendor_name': vendor_name} if vendor_id in found else None
+                for vendor_id, vendor_name in params]
+
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+def get_coalescer():
+    """ Return the shared WriteCoalescer, starting it on first use """
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None or _coalescer.closed:
+            _coalescer = WriteCoalescer()
+    return _coalescer